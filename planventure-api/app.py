@@ -1,60 +1,137 @@
-import os
-from datetime import datetime
-from flask import Flask, jsonify
-from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
-from flask_jwt_extended import JWTManager
-from dotenv import load_dotenv
+import fnmatch
+import hashlib
+import importlib
+import re
+import threading
+from datetime import datetime, timezone
+import click
+import orjson
+from cachetools import TTLCache
+from flask import Flask, jsonify, request
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from config import Config
 from models.user import db
 from models.trip import Trip  # Import to ensure table creation
-from sqlalchemy import text
+from utils.auth import CachedJWTManager
+from utils.json_provider import OrjsonProvider
+from utils.middleware import auth_required
+import sqlite3
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine
 
-# Load environment variables from .env file for secure configuration
-load_dotenv()
+# Timezone-aware UTC clock for response timestamps (datetime.utcnow is deprecated in 3.12)
+_utcnow = datetime.now
+_UTC = timezone.utc
 
 # Initialize Flask application instance
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # orjson-backed jsonify() and request.get_json()
 
 # CONFIGURATION SECTION
-# Set up application configuration from environment variables with fallback defaults
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')  # Used for Flask sessions and security
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')  # Used for JWT token signing
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///planventure.db')  # Database connection
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False  # Disable SQLAlchemy event system (saves memory)
+# All environment-derived settings are frozen once in config.Config (which also loads .env)
+app.config.from_object(Config)
+
+# SQLITE TUNING
+# WAL mode lets readers proceed while a writer commits and, with synchronous=NORMAL,
+# avoids an fsync on every commit. Applied to each new connection; other backends
+# (e.g. PostgreSQL) are left untouched.
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply performance PRAGMAs to every new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')        # Concurrent readers during writes
+    cursor.execute('PRAGMA synchronous=NORMAL')      # Safe with WAL, far fewer fsyncs
+    cursor.execute('PRAGMA temp_store=MEMORY')       # Keep temp tables/indices in RAM
+    cursor.execute('PRAGMA mmap_size=268435456')     # Memory-map up to 256MB of the file
+    cursor.execute('PRAGMA cache_size=-64000')       # ~64MB page cache (negative = KiB)
+    cursor.close()
 
 # EXTENSIONS INITIALIZATION
 # Initialize Flask extensions with the app instance
 db.init_app(app)  # Database ORM
-jwt = JWTManager(app)  # JWT token management
+jwt = CachedJWTManager(app)  # JWT token management (caches verified tokens for a short window)
+
+# CORS CONFIGURATION
+# Allowed frontend origins, precompiled once: exact origins go in a frozenset for O(1)
+# membership checks; entries containing '*' become regexes (e.g. https://*.github.io)
+_CORS_ALLOWED = app.config['CORS_ORIGINS']
+_CORS_ORIGINS = frozenset(origin for origin in _CORS_ALLOWED if '*' not in origin)
+_CORS_ORIGIN_PATTERNS = tuple(re.compile(fnmatch.translate(origin)) for origin in _CORS_ALLOWED if '*' in origin)
+_CORS_METHODS = 'GET, POST, PUT, DELETE, OPTIONS'
+_CORS_HEADERS = 'Content-Type, Authorization'
+
+def _origin_allowed(origin):
+    """Check a request Origin against the precompiled allowlist"""
+    return origin in _CORS_ORIGINS or any(pattern.match(origin) for pattern in _CORS_ORIGIN_PATTERNS)
 
-# Enhanced CORS configuration for React frontend
-CORS(app, 
-     origins=os.getenv('CORS_ORIGINS', 'https://kdornadula.github.io,http://localhost:3000').split(','),
-     methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-     allow_headers=['Content-Type', 'Authorization'],
-     supports_credentials=True)
+@app.after_request
+def apply_cors_headers(response):
+    """
+    Add CORS headers for allowed origins (React frontend)
+    
+    Note:
+        - Credentials are allowed, so the specific origin is echoed (never '*')
+        - Preflight (OPTIONS) responses also advertise allowed methods and headers
+        - Requests without an Origin header (same-origin, curl) are untouched
+    """
+    origin = request.headers.get('Origin')
+    if origin and _origin_allowed(origin):
+        response.headers['Access-Control-Allow-Origin'] = origin
+        response.headers['Access-Control-Allow-Credentials'] = 'true'
+        response.vary.add('Origin')
+        if request.method == 'OPTIONS':
+            response.headers['Access-Control-Allow-Methods'] = _CORS_METHODS
+            response.headers['Access-Control-Allow-Headers'] = _CORS_HEADERS
+    return response
 
 # JWT ERROR HANDLERS
-# Custom error handlers for different JWT-related failures
+# Custom error handlers for different JWT-related failures. The bodies never vary,
+# so they are serialized once here instead of on every failed request.
+_EXPIRED_TOKEN_BODY = orjson.dumps({"error": "Token has expired", "message": "Please log in again"})
+_INVALID_TOKEN_BODY = orjson.dumps({"error": "Invalid token", "message": "Token is invalid or malformed"})
+_MISSING_TOKEN_BODY = orjson.dumps({"error": "Token required", "message": "Request does not contain an access token"})
+
+def _prebuilt_json_response(body, status):
+    """Wrap pre-serialized JSON bytes in a response"""
+    return app.response_class(body, status=status, mimetype='application/json')
+
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
     """Handle requests with expired JWT tokens"""
-    return jsonify({"error": "Token has expired", "message": "Please log in again"}), 401
+    return _prebuilt_json_response(_EXPIRED_TOKEN_BODY, 401)
 
 @jwt.invalid_token_loader
 def invalid_token_callback(error):
     """Handle requests with malformed or invalid JWT tokens"""
-    return jsonify({"error": "Invalid token", "message": "Token is invalid or malformed"}), 401
+    return _prebuilt_json_response(_INVALID_TOKEN_BODY, 401)
 
 @jwt.unauthorized_loader
 def missing_token_callback(error):
     """Handle requests missing required JWT tokens"""
-    return jsonify({"error": "Token required", "message": "Request does not contain an access token"}), 401
+    return _prebuilt_json_response(_MISSING_TOKEN_BODY, 401)
 
-@jwt.additional_claims_loader
-def add_claims_to_jwt(identity):
-    """Add additional claims to JWT tokens (user_id for convenience)"""
-    return {"user_id": identity}
+# REQUEST SIZE LIMIT
+# Oversized bodies are refused from the Content-Length header alone, before a route
+# reads or parses anything (route-level try/except blocks would otherwise turn the
+# werkzeug error into a 500)
+_PAYLOAD_TOO_LARGE_BODY = orjson.dumps({
+    "error": "Request body too large",
+    "max_bytes": app.config['MAX_CONTENT_LENGTH']
+})
+
+@app.before_request
+def reject_oversized_bodies():
+    """Return 413 when the declared body size exceeds MAX_CONTENT_LENGTH"""
+    content_length = request.content_length
+    if content_length is not None and content_length > app.config['MAX_CONTENT_LENGTH']:
+        return _prebuilt_json_response(_PAYLOAD_TOO_LARGE_BODY, 413)
+
+@app.errorhandler(413)
+def payload_too_large(error):
+    """Return JSON for bodies that exceed the limit while streaming (no Content-Length)"""
+    return _prebuilt_json_response(_PAYLOAD_TOO_LARGE_BODY, 413)
 
 # BASIC ROUTES
 # Core application routes for health checking and basic information
@@ -63,21 +140,32 @@ def home():
     """Welcome endpoint - provides basic API information"""
     return jsonify({"message": "Welcome to PlanVenture API"})
 
-# ENHANCED HEALTH CHECK ENDPOINTS
-@app.route('/health')
-def health_check():
+# HEALTH CHECK CACHE
+# Load balancers and orchestrators probe health endpoints constantly; results are
+# memoized briefly so only one probe per window actually touches the database
+_health_cache = TTLCache(maxsize=4, ttl=10)
+_health_cache_lock = threading.Lock()
+
+def _cached(key, fn):
     """
-    Enhanced health check endpoint with database connectivity and system status
+    Return the cached (payload, status_code) for key, computing it with fn on a miss
     
-    Returns:
-        200: System healthy with detailed status
-        503: System unhealthy with error details
+    Args:
+        key (str): Cache key (one per health endpoint)
+        fn (callable): Zero-argument function returning (payload dict, status code)
         
-    Note:
-        - Checks database connectivity
-        - Validates essential environment variables
-        - Used for monitoring, load balancers, and deployment verification
+    Returns:
+        tuple: (payload dict, status code)
     """
+    with _health_cache_lock:
+        result = _health_cache.get(key)
+        if result is None:
+            result = fn()
+            _health_cache[key] = result
+        return result
+
+def _build_health_status():
+    """Run the full system health check (database + environment)"""
     try:
         # Test database connectivity - fix the SQL syntax
         db.session.execute(text('SELECT 1'))
@@ -87,19 +175,15 @@ def health_check():
         db_status = f"error: {str(e)}"
         db_healthy = False
     
-    # Check essential environment variables
-    env_checks = {
-        "SECRET_KEY": bool(os.getenv('SECRET_KEY')),
-        "JWT_SECRET_KEY": bool(os.getenv('JWT_SECRET_KEY')),
-        "DATABASE_URL": bool(os.getenv('DATABASE_URL'))
-    }
+    # Essential environment variables (snapshotted at startup in Config)
+    env_checks = app.config['ENV_CHECKS']
     
     # Overall health status
     overall_healthy = db_healthy and all(env_checks.values())
     
     health_data = {
         "status": "healthy" if overall_healthy else "unhealthy",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _utcnow(_UTC).isoformat(),
         "version": "1.0.0",
         "database": {
             "status": db_status,
@@ -107,7 +191,7 @@ def health_check():
         },
         "environment": {
             "variables_configured": env_checks,
-            "cors_origins": os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
+            "cors_origins": app.config['CORS_ORIGINS']
         },
         "services": {
             "authentication": "operational",
@@ -118,73 +202,209 @@ def health_check():
     
     # Return appropriate status code
     status_code = 200 if overall_healthy else 503
-    return jsonify(health_data), status_code
-
-@app.route('/health/simple')
-def simple_health_check():
-    """Simple health check for basic monitoring"""
-    return jsonify({"status": "ok", "timestamp": datetime.utcnow().isoformat()}), 200
+    return health_data, status_code
 
-@app.route('/health/database')
-def database_health_check():
-    """Specific database connectivity check"""
+def _build_database_status():
+    """Run the database-specific health check"""
     try:
-        # Test database with a simple query - fix syntax here too
-        result = db.session.execute(text('SELECT COUNT(*) FROM users'))
-        user_count = result.scalar()
+        # Check connectivity, not capability - a constant-time probe that
+        # does not scan the users table as it grows
+        db.session.execute(text('SELECT 1'))
         
-        return jsonify({
+        return {
             "database": "healthy",
-            "user_count": user_count,
-            "timestamp": datetime.utcnow().isoformat()
-        }), 200
+            "timestamp": _utcnow(_UTC).isoformat()
+        }, 200
     except Exception as e:
-        return jsonify({
+        return {
             "database": "unhealthy",
             "error": str(e),
-            "timestamp": datetime.utcnow().isoformat()
-        }), 503
+            "timestamp": _utcnow(_UTC).isoformat()
+        }, 503
 
-# BLUEPRINT REGISTRATION
-# Register route blueprints (modular route collections) with error handling
-try:
-    # Authentication routes (register, login, email validation)
-    from routes.auth import auth_bp
-    app.register_blueprint(auth_bp)
-    print("✅ Auth routes registered successfully")
+# ENHANCED HEALTH CHECK ENDPOINTS
+@app.route('/health')
+def health_check():
+    """
+    Enhanced health check endpoint with database connectivity and system status
     
-    # Protected example routes (for testing authentication middleware)
-    from routes.protected_example import protected_bp
-    app.register_blueprint(protected_bp)
-    print("✅ Protected routes registered successfully")
+    Returns:
+        200: System healthy with detailed status
+        503: System unhealthy with error details
+        
+    Note:
+        - Checks database connectivity
+        - Validates essential environment variables
+        - Used for monitoring, load balancers, and deployment verification
+        - Result is cached for 10 seconds to absorb probe storms
+    """
+    health_data, status_code = _cached('health', _build_health_status)
+    return jsonify(health_data), status_code
+
+# Static liveness payload - probes keep their own clock, so no timestamp is needed
+_SIMPLE_HEALTH_JSON = b'{"status":"ok"}\n'
+_SIMPLE_HEALTH_ETAG = hashlib.md5(_SIMPLE_HEALTH_JSON).hexdigest()
+
+@app.route('/health/simple')
+def simple_health_check():
+    """
+    Simple health check for basic monitoring
     
-    # Trip management routes (CRUD operations for trips)
-    from routes.trips import trips_bp
-    app.register_blueprint(trips_bp)
-    print("✅ Trips routes registered successfully")
+    Note:
+        - Returns an ETag; probes sending If-None-Match get an empty 304 response
+    """
+    response = app.response_class(_SIMPLE_HEALTH_JSON, mimetype='application/json')
+    response.set_etag(_SIMPLE_HEALTH_ETAG)
+    return response.make_conditional(request)
+
+@app.route('/health/database')
+def database_health_check():
+    """Specific database connectivity check (cached for 10 seconds)"""
+    data, status_code = _cached('database', _build_database_status)
+    return jsonify(data), status_code
+
+@app.route('/health/pool')
+@auth_required()
+def pool_status():
+    """Connection pool metrics for monitoring - requires authentication"""
+    return jsonify({
+        "pool": db.engine.pool.status(),
+        "timestamp": _utcnow(_UTC).isoformat()
+    }), 200
+
+# BLUEPRINT REGISTRATION
+# Route blueprints (modular route collections) as (label, module, attribute) entries.
+# Modules are imported by name, so a deployment can trim the list via app.config
+# and never pay the import cost of blueprints it doesn't serve.
+app.config.setdefault('BLUEPRINTS', [
+    ('Auth', 'routes.auth', 'auth_bp'),                            # Register, login, email validation
+    ('Protected', 'routes.protected_example', 'protected_bp'),     # Authentication middleware examples
+    ('Trips', 'routes.trips', 'trips_bp'),                         # Trip CRUD, search and templates
+])
+
+def register_blueprints():
+    """Import and register every blueprint listed in app.config['BLUEPRINTS']"""
+    for label, module_name, attribute in app.config['BLUEPRINTS']:
+        try:
+            module = importlib.import_module(module_name)
+            app.register_blueprint(getattr(module, attribute))
+            print(f"✅ {label} routes registered successfully")
+        except ImportError as e:
+            # Handle cases where blueprint imports fail (missing dependencies, syntax errors)
+            print(f"❌ Warning: Could not import {label.lower()} routes: {e}")
+
+register_blueprints()
+
+# SLOW QUERY LOGGING
+@app.after_request
+def log_slow_queries(response):
+    """
+    Log every query in this request that ran longer than DATABASE_QUERY_TIMEOUT
     
-except ImportError as e:
-    # Handle cases where blueprint imports fail (missing dependencies, syntax errors)
-    print(f"❌ Warning: Could not import routes: {e}")
+    Note:
+        - Only runs when SQLALCHEMY_RECORD_QUERIES is enabled (off by default)
+        - Bound parameters are never logged - they can hold password hashes and emails
+    """
+    if app.config['SQLALCHEMY_RECORD_QUERIES']:
+        for query in get_recorded_queries():
+            if query.duration >= app.config['DATABASE_QUERY_TIMEOUT']:
+                app.logger.warning(
+                    'SLOW QUERY %.3fs: %s\nLocation: %s',
+                    query.duration, query.statement, query.location
+                )
+    return response
 
 # DEBUGGING UTILITIES
-@app.route('/routes')
-def list_routes():
-    """Development endpoint - lists all available routes for debugging"""
+_routes_json = None  # Serialized route list, built on first request once every route is registered
+_routes_etag = None  # ETag of _routes_json
+
+def _build_routes_json():
+    """Serialize the URL map once (routes never change after startup)"""
     routes = []
     for rule in app.url_map.iter_rules():
         routes.append({
             'endpoint': rule.endpoint,  # Function name
-            'methods': list(rule.methods),  # HTTP methods (GET, POST, etc.)
+            'methods': sorted(rule.methods),  # HTTP methods (GET, POST, etc.)
             'path': str(rule)  # URL pattern
         })
-    return jsonify(routes)
+    return app.json.dumps(routes).encode('utf-8')
+
+@app.route('/routes')
+def list_routes():
+    """
+    Development endpoint - lists all available routes for debugging
+    
+    Note:
+        - Only served when the app runs in debug mode (404 otherwise, to avoid leaking the API surface)
+        - The JSON body is computed once and reused for every later request
+        - Supports conditional requests (ETag / If-None-Match -> 304)
+    """
+    global _routes_json, _routes_etag
+    if not app.debug:
+        return jsonify({"error": "Not found"}), 404
+    if _routes_json is None:
+        _routes_json = _build_routes_json()
+        _routes_etag = hashlib.md5(_routes_json).hexdigest()
+    response = app.response_class(_routes_json, mimetype='application/json')
+    response.set_etag(_routes_etag)
+    return response.make_conditional(request)
 
 # DATABASE INITIALIZATION
+def existing_index_names(connection, table_name):
+    """Names of the indexes already on a table"""
+    if connection.dialect.name == 'sqlite':
+        # SQLite reflection skips expression indexes such as lower(email_address)
+        rows = connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"),
+            {'table': table_name}
+        )
+        return {row[0] for row in rows}
+    return {index['name'] for index in inspect(connection).get_indexes(table_name)}
+
+def create_missing_indexes():
+    """
+    Add model indexes that are missing from existing tables
+    
+    Note:
+        - create_all() only creates indexes together with a brand-new table, so
+          indexes declared after a database was first set up never reach it
+        - Each index is checked first; existing ones are left untouched
+        - PostgreSQL-only indexes (GIN/trigram) are skipped on other databases
+    """
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            existing = existing_index_names(connection, table.name)
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+
 def create_tables():
-    """Initialize database tables within Flask application context"""
+    """Initialize database tables and indexes within Flask application context"""
     with app.app_context():
-        db.create_all()  # Create all tables defined in models
+        db.create_all()  # Create missing tables (existing ones are checked and kept)
+        create_missing_indexes()
+
+@app.cli.command('init-db')
+@click.option('--reset', is_flag=True, help='Drop all tables before recreating them (deletes all data).')
+def init_db_command(reset):
+    """
+    Create the database tables (usage: flask --app app init-db [--reset])
+    
+    Note:
+        - Idempotent without --reset: existing tables and data are kept
+        - --reset asks for confirmation, then drops and recreates every table
+    """
+    with app.app_context():
+        if reset:
+            click.confirm('⚠️  WARNING: This will delete all existing data! Continue?', abort=True)
+            db.drop_all()
+            click.echo('🗑️  Dropped all existing tables')
+        db.create_all()
+        create_missing_indexes()
+        
+        click.echo('✅ Database tables created successfully!')
+        click.echo(f"📍 Database location: {app.config['SQLALCHEMY_DATABASE_URI']}")
+        click.echo(f"📋 Tables: {', '.join(inspect(db.engine).get_table_names())}")
 
 # APPLICATION ENTRY POINT
 if __name__ == '__main__':
@@ -0,0 +1,12 @@
+"""
+Process bootstrap for Planventure API entry points
+
+Importing this module loads the .env file exactly once per process (Python
+caches the import), so app.py, config.py and helper scripts never parse
+.env more than once.
+"""
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file for secure configuration
+load_dotenv()
@@ -0,0 +1,66 @@
+"""
+Application configuration for Planventure API
+
+All environment-derived settings are read once, at import time, and loaded
+into Flask with app.config.from_object(Config). Request handlers read
+app.config and never touch os.environ.
+"""
+
+import os
+import bootstrap  # noqa: F401 - loads .env before any value below is read
+
+def _env_flag(name, default):
+    """Read a true/false environment variable"""
+    return os.getenv(name, default).lower() == 'true'
+
+def _env_positive_int(name, default):
+    """Read a positive integer environment variable (missing or invalid -> default)"""
+    try:
+        value = int(os.getenv(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+class Config:
+    """Default configuration populated from environment variables with fallback defaults"""
+    
+    # SECURITY
+    SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')  # Used for Flask sessions and security
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')  # Used for JWT token signing
+    USE_VERIFY_PASSWORD_CACHE = _env_flag('USE_VERIFY_PASSWORD_CACHE', 'false')  # Reuse recent bcrypt results (off by default)
+    PASSWORD_HASH_CONCURRENCY = _env_positive_int('PASSWORD_HASH_CONCURRENCY', os.cpu_count() or 4)  # Max password hashes running at once
+    
+    # DATABASE
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///planventure.db')  # Database connection
+    SQLALCHEMY_TRACK_MODIFICATIONS = False  # Disable SQLAlchemy event system (saves memory)
+    SQLALCHEMY_RECORD_QUERIES = _env_flag('SQLALCHEMY_RECORD_QUERIES', 'false')  # Record query timings for slow-query logging (off by default)
+    DATABASE_QUERY_TIMEOUT = float(os.getenv('DATABASE_QUERY_TIMEOUT', '0.1'))  # Seconds before a query is logged as slow
+    
+    # Connection pool tuning - pre-ping validates pooled connections so a database
+    # restart doesn't surface as stale-connection 500s
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # SQLite connections are file handles; allow the pool to hand them to any worker thread
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_pre_ping': True,
+            'connect_args': {'check_same_thread': False}
+        }
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': 20,        # Persistent connections kept open
+            'max_overflow': 10,     # Extra connections allowed under burst load
+            'pool_pre_ping': True,  # Test connections before handing them out
+            'pool_recycle': 1800,   # Recycle connections every 30 minutes
+            'pool_timeout': 5       # Fail fast instead of queueing indefinitely
+        }
+    
+    # REQUEST LIMITS - bodies larger than this are rejected with 413 before any
+    # JSON parsing (Flask/Werkzeug also enforce it while reading the stream)
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', str(64 * 1024)))
+    
+    # CORS - allowed frontend origins
+    CORS_ORIGINS = [origin.strip() for origin in
+                    os.getenv('CORS_ORIGINS', 'https://kdornadula.github.io,http://localhost:3000').split(',')
+                    if origin.strip()]
+    
+    # HEALTH CHECKS - which essential variables were explicitly configured
+    ENV_CHECKS = {key: bool(os.getenv(key)) for key in ('SECRET_KEY', 'JWT_SECRET_KEY', 'DATABASE_URL')}
@@ -1,5 +1,7 @@
+import operator
 from datetime import datetime, date
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import JSONB
 from models.user import db
 
 class Trip(db.Model):
@@ -12,6 +14,28 @@ class Trip(db.Model):
     """
     __tablename__ = 'trips'  # Explicit table name in database
     
+    # INDEXES
+    # Composite indexes serve "my trips" queries: filter on user_id, then order by
+    # start/creation date straight from the index (no full scan or sort step).
+    # user_id alone is covered by the leftmost column of either index.
+    __table_args__ = (
+        db.Index('ix_trips_user_start', 'user_id', 'start_date'),
+        # Matches the list ordering (created_at DESC, id DESC) including the id
+        # tie-breaker, so keyset pages are a single index range scan
+        db.Index('ix_trips_user_created', 'user_id', 'created_at', 'id'),
+        # Destination search within one user's trips: the index covers the
+        # user_id filter and the destination match without touching table rows
+        db.Index('ix_trips_user_dest', 'user_id', 'destination'),
+        # Trigram GIN index so destination ILIKE '%term%' avoids a sequential scan -
+        # PostgreSQL only (needs pg_trgm, created below)
+        db.Index(
+            'ix_trips_destination_trgm', 'destination',
+            postgresql_using='gin', postgresql_ops={'destination': 'gin_trgm_ops'}
+        ).ddl_if(dialect='postgresql'),
+        # GIN index for querying inside itineraries - PostgreSQL (JSONB) only
+        db.Index('ix_trips_itinerary', 'itinerary', postgresql_using='gin').ddl_if(dialect='postgresql'),
+    )
+    
     # PRIMARY KEY AND RELATIONSHIPS
     id = db.Column(db.Integer, primary_key=True)  # Unique trip identifier
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)  # Foreign key to users table
@@ -26,7 +50,9 @@ class Trip(db.Model):
     longitude = db.Column(db.Float, nullable=True)  # Geographic longitude coordinate
     
     # DETAILED TRIP INFORMATION
-    itinerary = db.Column(db.Text, nullable=True)  # JSON string containing day-by-day itinerary details
+    # Native JSON column (JSONB on PostgreSQL) holding day-by-day itinerary details;
+    # the database driver encodes/decodes it, so the API stores and returns real objects
+    itinerary = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'), nullable=True)
     
     # METADATA AND TIMESTAMPS
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Trip creation timestamp
@@ -41,39 +67,89 @@ class Trip(db.Model):
         """String representation for debugging and logging"""
         return f'<Trip {self.destination} - {self.start_date} to {self.end_date}>'
     
+    # Every column the API serializes, in to_dict order
+    SERIALIZED_COLUMNS = (
+        'id', 'user_id', 'destination', 'start_date', 'end_date',
+        'latitude', 'longitude', 'itinerary', 'created_at', 'updated_at'
+    )
+    
+    # Single C-level getter for every column to_dict needs (one call instead of ten attribute lookups)
+    _GET = operator.attrgetter(*SERIALIZED_COLUMNS)
+    
+    @classmethod
+    def serialized_columns(cls):
+        """
+        Column attributes for a Core select() that feeds row_to_dict()
+        
+        Returns:
+            list: InstrumentedAttributes in SERIALIZED_COLUMNS order
+            
+        Usage:
+            rows = db.session.execute(select(*Trip.serialized_columns()).where(...))
+        """
+        return [getattr(cls, name) for name in cls.SERIALIZED_COLUMNS]
+    
     def to_dict(self):
         """
         Convert trip instance to dictionary for API responses
         
+        Returns:
+            dict: Trip data formatted for JSON API responses
+        """
+        return Trip.row_to_dict(self)
+    
+    @staticmethod
+    def row_to_dict(row):
+        """
+        Convert a trip (ORM instance or Core result row) to an API dictionary
+        
+        Args:
+            row: Trip instance, or a Row selected with Trip.serialized_columns()
+            
         Returns:
             dict: Trip data formatted for JSON API responses
             
         Note:
-            - Converts dates to ISO format strings for JSON compatibility
+            - Dates/datetimes are left as objects; the orjson JSON provider emits them as ISO 8601
             - Groups coordinates into nested object for cleaner API
             - Includes all relevant trip information
             - Safe for external API consumption
+            - Reads column attributes only (never the user relationship), so
+              serializing a list of trips issues no extra queries
+            - List endpoints pass Core rows and skip ORM object construction
         """
+        (trip_id, user_id, destination, start_date, end_date,
+         latitude, longitude, itinerary, created_at, updated_at) = Trip._GET(row)
+        
         return {
             # Basic trip identification
-            'id': self.id,
-            'user_id': self.user_id,
+            'id': trip_id,
+            'user_id': user_id,
             
             # Trip details
-            'destination': self.destination,
-            'start_date': self.start_date.isoformat() if self.start_date else None,  # Convert date to string
-            'end_date': self.end_date.isoformat() if self.end_date else None,  # Convert date to string
+            'destination': destination,
+            'start_date': start_date,
+            'end_date': end_date,
             
             # Location data (grouped for cleaner API response)
             'coordinates': {
-                'latitude': self.latitude,
-                'longitude': self.longitude
-            } if self.latitude and self.longitude else None,  # Only include if both coordinates exist
+                'latitude': latitude,
+                'longitude': longitude
+            } if latitude and longitude else None,  # Only include if both coordinates exist
             
             # Detailed information
-            'itinerary': self.itinerary,  # JSON string (will be parsed by frontend)
+            'itinerary': itinerary,  # Parsed JSON object
             
             # Metadata
-            'created_at': self.created_at.isoformat(),  # Convert datetime to ISO string
-            'updated_at': self.updated_at.isoformat()   # Convert datetime to ISO string
+            'created_at': created_at,
+            'updated_at': updated_at
         }
+
+# pg_trgm provides gin_trgm_ops for ix_trips_destination_trgm; enable it right before
+# that index is created - with a new trips table or when the index is added to an
+# existing one later. No-op on other databases.
+event.listen(
+    next(index for index in Trip.__table__.indexes if index.name == 'ix_trips_destination_trgm'),
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
@@ -1,10 +1,88 @@
+import hashlib
+import threading
 from datetime import datetime
+from cachetools import TTLCache
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, text
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 import bcrypt
+from config import Config
 
 # Initialize SQLAlchemy instance for database operations
 db = SQLAlchemy()
 
+# PASSWORD HASHING
+# Argon2id with the OWASP-recommended minimum parameters (19 MiB memory, 2 iterations).
+# Hashes created before the switch are bcrypt ('$2...') and are still verified with bcrypt.
+_PH = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+_BCRYPT_PREFIX = '$2'
+
+# Both argon2-cffi and bcrypt release the GIL while hashing, so request threads
+# (gunicorn gthread, waitress, threaded dev server) hash in parallel. Cap how many
+# run at once so a login burst can't exhaust memory (19 MiB each) or starve the
+# CPU; extra callers wait for a free slot instead. Sized from
+# Config.PASSWORD_HASH_CONCURRENCY (the semaphore must exist before any app does).
+_HASH_SLOTS = threading.BoundedSemaphore(Config.PASSWORD_HASH_CONCURRENCY)
+
+def _hash_password(password):
+    """Hash a plain text password with Argon2id"""
+    with _HASH_SLOTS:
+        return _PH.hash(password)
+
+# Fixed hash verified when there is no real hash to check (unknown user, missing
+# password) so those paths spend the same time hashing as a genuine mismatch.
+# Computed once at import.
+_DUMMY_HASH = _PH.hash('planventure-dummy-password')
+
+def _verify_password_hash(password, password_hash):
+    """
+    Verify a plain text password against an Argon2 or legacy bcrypt hash
+    
+    Args:
+        password (str): Plain text password
+        password_hash (str): Stored hash
+        
+    Returns:
+        bool: True if password matches hash
+    """
+    with _HASH_SLOTS:
+        if password_hash.startswith(_BCRYPT_PREFIX):
+            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        try:
+            return _PH.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            # VerifyMismatchError (wrong password) is a VerificationError subclass
+            return False
+
+def verify_dummy_password(password):
+    """
+    Run a full password verification against a fixed dummy hash
+    
+    Args:
+        password (str): Plain text password supplied by the client
+        
+    Returns:
+        bool: Always False
+        
+    Note:
+        - Equalizes response time between "no such user" and "wrong password"
+          so login timing cannot be used to enumerate accounts
+    """
+    _verify_password_hash(password, _DUMMY_HASH)
+    return False
+
+# PASSWORD VERIFICATION CACHE (opt-in via USE_VERIFY_PASSWORD_CACHE)
+# Remembers recent verification results for identical credentials so
+# repeated checks within a minute skip the deliberately slow hash round
+_PW_CACHE = TTLCache(maxsize=2048, ttl=60)
+_PW_CACHE_LOCK = threading.Lock()
+
+def _verify_password_cache_enabled():
+    """Check whether the password verification cache is switched on for this app"""
+    return has_app_context() and current_app.config.get('USE_VERIFY_PASSWORD_CACHE', False)
+
 class User(db.Model):
     """
     User model for handling user accounts and authentication
@@ -15,12 +93,21 @@ class User(db.Model):
     """
     __tablename__ = 'users'  # Explicit table name in database
     
+    # INDEXES
+    # Case-insensitive uniqueness enforced by the database itself: 'A@x.com' and
+    # 'a@x.com' can never both exist, and lookups on lower(email_address) use
+    # this index (SQLite 3.9+ and PostgreSQL support expression indexes).
+    # Existing databases get it from create_missing_indexes() at startup/init-db.
+    __table_args__ = (
+        db.Index('ix_users_email_lower', func.lower(text('email_address')), unique=True),
+    )
+    
     # PRIMARY KEY AND IDENTIFICATION
     user_id = db.Column(db.Integer, primary_key=True, autoincrement=True)  # Unique user identifier
     email_address = db.Column(db.String(150), unique=True, nullable=False, index=True)  # User's email (indexed for fast lookups)
     
     # SECURITY FIELDS
-    hashed_password = db.Column(db.String(300), nullable=False)  # Bcrypt hashed password (never store plain text)
+    hashed_password = db.Column(db.String(300), nullable=False)  # Argon2id (or legacy bcrypt) hash (never store plain text)
     
     # METADATA AND TIMESTAMPS
     account_created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Account creation timestamp
@@ -34,22 +121,17 @@ class User(db.Model):
     # PASSWORD MANAGEMENT METHODS
     def set_password(self, password):
         """
-        Hash and store user password securely using bcrypt
+        Hash and store user password securely using Argon2id
         
         Args:
             password (str): Plain text password to hash
             
         Note:
-            - Generates unique salt for each password
-            - Uses bcrypt for secure, slow hashing
+            - Generates unique salt for each password (embedded in the hash string)
+            - Uses memory-hard Argon2id hashing
             - Stores only the hash, never the plain text
         """
-        # Generate cryptographically secure salt
-        salt = bcrypt.gensalt()
-        # Hash password with salt using bcrypt
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), salt)
-        # Store as string in database
-        self.hashed_password = password_hash.decode('utf-8')
+        self.hashed_password = _hash_password(password)
     
     def check_password(self, password):
         """
@@ -62,18 +144,66 @@ class User(db.Model):
             bool: True if password matches, False otherwise
             
         Note:
-            - Uses bcrypt's secure comparison to prevent timing attacks
-            - Returns False if no password hash is stored
+            - Uses Argon2's (or bcrypt's, for legacy hashes) secure comparison to prevent timing attacks
+            - Returns False if no password hash is stored (after a dummy verify, for constant timing)
+            - When USE_VERIFY_PASSWORD_CACHE is enabled, results are reused for 60 seconds
         """
         if not self.hashed_password:
-            return False
-        return bcrypt.checkpw(password.encode('utf-8'), self.hashed_password.encode('utf-8'))
+            return verify_dummy_password(password)
+        
+        if not _verify_password_cache_enabled():
+            return _verify_password_hash(password, self.hashed_password)
+        
+        # Key covers both the candidate password and the stored hash, so a
+        # password change naturally invalidates earlier results
+        key = hashlib.sha256(password.encode('utf-8') + self.hashed_password.encode('utf-8')).digest()
+        with _PW_CACHE_LOCK:
+            cached = _PW_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
+        result = _verify_password_hash(password, self.hashed_password)
+        with _PW_CACHE_LOCK:
+            _PW_CACHE[key] = result
+        return result
     
-    # UTILITY METHODS
-    def update_timestamp(self):
-        """Manually update the last modified timestamp"""
-        self.last_updated_at = datetime.utcnow()
+    def password_needs_rehash(self):
+        """
+        Check whether the stored hash should be upgraded
+        
+        Returns:
+            bool: True for legacy bcrypt hashes or Argon2 hashes with outdated parameters
+            
+        Note:
+            - Call after a successful check_password, then set_password with the same
+              plain text password to transparently migrate the account
+        """
+        if not self.hashed_password or self.hashed_password.startswith(_BCRYPT_PREFIX):
+            return True
+        try:
+            return _PH.check_needs_rehash(self.hashed_password)
+        except InvalidHashError:
+            return True
     
+    # QUERY HELPERS
+    @classmethod
+    def by_email(cls, email):
+        """
+        Build a query for the user with this email, ignoring case
+        
+        Args:
+            email (str): Email address, already lowercased by the caller
+            
+        Returns:
+            Query: Filtered query (call .first(), .exists(), ...)
+            
+        Note:
+            - Compares against lower(email_address) so it also matches mixed-case
+              rows written outside the API, and is served by ix_users_email_lower
+        """
+        return cls.query.filter(func.lower(cls.email_address) == email)
+    
+    # UTILITY METHODS
     def get_user_info(self):
         """
         Return user information as dictionary (excluding sensitive data)
@@ -83,14 +213,14 @@ class User(db.Model):
             
         Note:
             - Excludes password hash for security
-            - Formats timestamps as readable strings
+            - Timestamps are serialized as ISO 8601 by the orjson JSON provider
             - Safe to return in API responses
         """
         return {
             'user_id': self.user_id,
             'email_address': self.email_address,
-            'account_created_at': self.account_created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'last_updated_at': self.last_updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'account_created_at': self.account_created_at,
+            'last_updated_at': self.last_updated_at,
             'is_active': self.is_active
         }
     
@@ -104,12 +234,11 @@ class User(db.Model):
             password (str): Plain text password to hash
             
         Returns:
-            str: Bcrypt hashed password
+            str: Argon2id hashed password
             
         Use case: For testing or external password hashing
         """
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        return _hash_password(password)
     
     @staticmethod
     def verify_password(password, password_hash):
@@ -118,11 +247,11 @@ class User(db.Model):
         
         Args:
             password (str): Plain text password
-            password_hash (str): Stored bcrypt hash
+            password_hash (str): Stored Argon2 or legacy bcrypt hash
             
         Returns:
             bool: True if password matches hash
             
         Use case: For testing or external password verification
         """
-        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        return _verify_password_hash(password, password_hash)
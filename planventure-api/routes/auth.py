@@ -1,26 +1,50 @@
 import re
 from flask import Blueprint, request, jsonify
 from werkzeug.exceptions import BadRequest
-from models.user import db, User
+from sqlalchemy.exc import IntegrityError
+from models.user import db, User, verify_dummy_password
 from utils.auth import generate_tokens
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# Email pattern compiled once at import (skips the re module cache lookup per call)
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+def _norm_email(raw):
+    """Normalize an email from request data once per request (missing/None -> '')"""
+    return (raw or '').strip().lower()
+
 def validate_email(email):
     """Validate email format using regex"""
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(email_pattern, email) is not None
+    return EMAIL_RE.match(email) is not None
 
 def validate_password(password):
     """Validate password requirements"""
     if len(password) < 8:
         return False, "Password must be at least 8 characters long"
-    if not re.search(r'[A-Za-z]', password):
+    
+    # Single pass over the characters instead of two regex scans;
+    # letters are ASCII-only (as [A-Za-z] was), digits match \d (str.isdecimal)
+    has_letter = False
+    has_digit = False
+    for char in password:
+        if not has_letter and char.isascii() and char.isalpha():
+            has_letter = True
+        elif not has_digit and char.isdecimal():
+            has_digit = True
+        if has_letter and has_digit:
+            break
+    
+    if not has_letter:
         return False, "Password must contain at least one letter"
-    if not re.search(r'\d', password):
+    if not has_digit:
         return False, "Password must contain at least one number"
     return True, "Password is valid"
 
+def email_exists(email):
+    """Check whether an account uses this email (SELECT EXISTS - no row is loaded)"""
+    return db.session.query(User.by_email(email).exists()).scalar()
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user with email validation"""
@@ -31,7 +55,7 @@ def register():
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        email = data.get('email', '').strip().lower()
+        email = _norm_email(data.get('email'))
         password = data.get('password', '')
         
         # Validate required fields
@@ -47,22 +71,22 @@ def register():
         if not is_valid:
             return jsonify({"error": message}), 400
         
-        # Check if user already exists
-        existing_user = User.query.filter_by(email_address=email).first()
-        if existing_user:
-            return jsonify({
-                "error": "User with this email already exists", 
-                "message": "Please use a different email or try logging in instead",
-                "suggestion": "Use /auth/login if you already have an account"
-            }), 409
-        
         # Create new user
         new_user = User(email_address=email)
         new_user.set_password(password)
         
-        # Save to database
+        # Save to database - the unique constraint on email_address detects
+        # existing accounts atomically (no separate lookup, no check/insert race)
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({
+                "error": "User with this email already exists", 
+                "message": "Please use a different email or try logging in instead",
+                "suggestion": "Use /auth/login if you already have an account"
+            }), 409
         
         # Generate JWT tokens
         tokens = generate_tokens(new_user)
@@ -87,7 +111,7 @@ def login():
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        email = data.get('email', '').strip().lower()
+        email = _norm_email(data.get('email'))
         password = data.get('password', '')
         
         # Validate required fields
@@ -95,14 +119,20 @@ def login():
             return jsonify({"error": "Email and password are required"}), 400
         
         # Find user by email
-        user = User.query.filter_by(email_address=email).first()
+        user = User.by_email(email).first()
         
-        if not user:
-            return jsonify({"error": "Invalid email or password"}), 401
+        # Always run one password verification so unknown emails take as long
+        # as wrong passwords (no user-enumeration timing oracle)
+        password_ok = user.check_password(password) if user else verify_dummy_password(password)
         
-        if not user.check_password(password):
+        if not user or not password_ok:
             return jsonify({"error": "Invalid email or password"}), 401
         
+        # Transparently upgrade legacy bcrypt hashes to Argon2id
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        
         # Check if user is active
         if not user.is_active:
             return jsonify({"error": "Account is deactivated"}), 401
@@ -128,7 +158,7 @@ def validate_email_endpoint():
     """Endpoint to validate email format"""
     try:
         data = request.get_json()
-        email = data.get('email', '').strip().lower()
+        email = _norm_email(data.get('email'))
         
         if not email:
             return jsonify({"error": "Email is required"}), 400
@@ -136,7 +166,7 @@ def validate_email_endpoint():
         is_valid = validate_email(email)
         
         # Also check if email already exists
-        exists = User.query.filter_by(email_address=email).first() is not None
+        exists = email_exists(email)
         
         return jsonify({
             "email": email,
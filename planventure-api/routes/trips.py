@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
-from datetime import datetime, date
+import base64
+import binascii
+from datetime import date, datetime
 from utils.middleware import auth_required, get_current_user
 from models.user import db
 from models.trip import Trip
-import json
+from utils.dates import parse_date
+import orjson
+from sqlalchemy import delete, func, insert, select, tuple_, update
 from utils.itinerary_templates import (
     generate_default_itinerary,
     generate_weekend_getaway_template,
@@ -15,6 +19,70 @@ from utils.itinerary_templates import (
 # All routes will be prefixed with '/trips'
 trips_bp = Blueprint('trips', __name__, url_prefix='/trips')
 
+# Result cap for /trips/search (?limit= may lower it, never above the maximum)
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 200
+
+# Destination length limits (the column is String(255))
+DESTINATION_MIN_LENGTH = 2
+DESTINATION_MAX_LENGTH = 255
+
+# (request field, label for error messages, absolute bound) for optional coordinates
+COORDINATE_BOUNDS = (
+    ('latitude', 'Latitude', 90),
+    ('longitude', 'Longitude', 180),
+)
+
+def encode_cursor(trip):
+    """
+    Build an opaque keyset-pagination cursor pointing just after a trip
+    
+    Args:
+        trip (Trip): Last trip on the current page
+        
+    Returns:
+        str: URL-safe base64 of [created_at ISO string, id]
+    """
+    raw = orjson.dumps([trip.created_at.isoformat(), trip.id])
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor (str): Cursor from the request query string
+        
+    Returns:
+        tuple: (created_at datetime, trip id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, trip_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(trip_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError, UnicodeEncodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def destination_contains(term):
+    """
+    Build a case-insensitive "destination contains term" filter
+    
+    Args:
+        term (str): Search text from the query string
+        
+    Returns:
+        ColumnElement: Filter expression for Trip.destination
+        
+    Note:
+        - LIKE wildcards in the term are escaped, so '%' and '_' match literally
+          (an unescaped '%' used to match every trip)
+        - On PostgreSQL the pattern is served by ix_trips_destination_trgm
+    """
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return Trip.destination.ilike(f'%{escaped}%', escape='\\')
+
 def validate_trip_data(data, is_update=False):
     """
     Validate trip data for creation or update operations
@@ -25,35 +93,46 @@ def validate_trip_data(data, is_update=False):
                          If False, requires all fields (for creation)
                          
     Returns:
-        list: List of validation error messages (empty if valid)
+        tuple: (errors, parsed)
+            errors (list): Validation error messages (empty if valid)
+            parsed (dict): Typed values for every accepted field (stripped
+                           'destination', 'start_date'/'end_date' as dates,
+                           'latitude'/'longitude' as floats, decoded 'itinerary')
+                           so callers never re-convert request data
         
     Note:
         - Validates destination, dates, coordinates, and itinerary
         - For updates, only validates fields that are present
         - Returns detailed error messages for user feedback
         - Used by both create and update endpoints
+        - Single pass: each field is converted once and the result kept in parsed
     """
     errors = []
+    parsed = {}
+    get = data.get  # Bound once; called for every field below
     
     # DESTINATION VALIDATION
     # Only validate destination if creating new trip or field is being updated
     if not is_update or 'destination' in data:
-        destination = data.get('destination', '').strip()
+        destination = get('destination', '').strip()
         if not destination:
             errors.append("Destination is required")
-        elif len(destination) < 2:
-            errors.append("Destination must be at least 2 characters long")
-        elif len(destination) > 255:
-            errors.append("Destination must be less than 255 characters")
+        elif len(destination) < DESTINATION_MIN_LENGTH:
+            errors.append(f"Destination must be at least {DESTINATION_MIN_LENGTH} characters long")
+        elif len(destination) > DESTINATION_MAX_LENGTH:
+            errors.append(f"Destination must be less than {DESTINATION_MAX_LENGTH} characters")
+        else:
+            parsed['destination'] = destination
     
     # START DATE VALIDATION
     if not is_update or 'start_date' in data:
-        start_date_str = data.get('start_date')
+        start_date_str = get('start_date')
         if not start_date_str:
             errors.append("Start date is required")
         else:
             try:
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+                start_date = parse_date(start_date_str)
+                parsed['start_date'] = start_date
                 # Prevent scheduling trips in the past
                 if start_date < date.today():
                     errors.append("Start date cannot be in the past")
@@ -62,50 +141,50 @@ def validate_trip_data(data, is_update=False):
     
     # END DATE VALIDATION
     if not is_update or 'end_date' in data:
-        end_date_str = data.get('end_date')
+        end_date_str = get('end_date')
         if not end_date_str:
             errors.append("End date is required")
         else:
             try:
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                # Ensure end date is after start date (if start date is also being set)
-                if 'start_date' in data:
-                    start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-                    if end_date <= start_date:
-                        errors.append("End date must be after start date")
+                end_date = parse_date(end_date_str)
+                parsed['end_date'] = end_date
+                # Ensure end date is after start date (if a valid start date is also being set)
+                if 'start_date' in parsed and end_date <= parsed['start_date']:
+                    errors.append("End date must be after start date")
             except ValueError:
                 errors.append("End date must be in YYYY-MM-DD format")
     
     # COORDINATE VALIDATION (OPTIONAL FIELDS)
-    # Validate latitude if provided
-    if 'latitude' in data:
-        try:
-            lat = float(data['latitude'])
-            if not -90 <= lat <= 90:
-                errors.append("Latitude must be between -90 and 90")
-        except (ValueError, TypeError):
-            errors.append("Latitude must be a valid number")
-    
-    # Validate longitude if provided
-    if 'longitude' in data:
-        try:
-            lng = float(data['longitude'])
-            if not -180 <= lng <= 180:
-                errors.append("Longitude must be between -180 and 180")
-        except (ValueError, TypeError):
-            errors.append("Longitude must be a valid number")
+    # One convert-and-range-check per coordinate; the float is kept for the route
+    for field, label, limit in COORDINATE_BOUNDS:
+        if field in data:
+            try:
+                value = float(data[field])
+            except (ValueError, TypeError):
+                errors.append(f"{label} must be a valid number")
+                continue
+            if -limit <= value <= limit:
+                parsed[field] = value
+            else:
+                errors.append(f"{label} must be between -{limit} and {limit}")
     
     # ITINERARY VALIDATION (OPTIONAL JSON FIELD)
-    if 'itinerary' in data and data['itinerary']:
-        try:
-            # If itinerary is provided as string, validate it's valid JSON
-            if isinstance(data['itinerary'], str):
-                json.loads(data['itinerary'])
-            # If it's already a dict/object, it should be fine
-        except json.JSONDecodeError:
-            errors.append("Itinerary must be valid JSON")
+    # Parsed exactly once here; the decoded object is what gets stored
+    if 'itinerary' in data:
+        itinerary = data['itinerary']
+        if not itinerary:
+            parsed['itinerary'] = None
+        elif isinstance(itinerary, str):
+            # String itinerary must be valid JSON (decoded so it isn't stored double-encoded)
+            try:
+                parsed['itinerary'] = orjson.loads(itinerary)
+            except orjson.JSONDecodeError:
+                errors.append("Itinerary must be valid JSON")
+        else:
+            # Already a dict/list from the request body - store as-is
+            parsed['itinerary'] = itinerary
     
-    return errors
+    return errors, parsed
 
 # CRUD OPERATIONS FOR TRIPS
 
@@ -148,32 +227,34 @@ def create_trip():
         return jsonify({"error": "No data provided"}), 400
     
     # Validate trip data (all fields required for creation)
-    errors = validate_trip_data(data)
+    errors, parsed = validate_trip_data(data)
     if errors:
         return jsonify({"error": "Validation failed", "details": errors}), 400
     
     try:
-        # Create new trip instance
-        new_trip = Trip(
+        # Single INSERT ... RETURNING: the response is built from the returned row,
+        # so there is no ORM object to construct and no post-commit refresh SELECT
+        stmt = insert(Trip).values(
             user_id=current_user.user_id,  # Associate with current user
-            destination=data['destination'].strip(),
-            start_date=datetime.strptime(data['start_date'], '%Y-%m-%d').date(),
-            end_date=datetime.strptime(data['end_date'], '%Y-%m-%d').date(),
+            # All values come pre-converted from the validator
+            destination=parsed['destination'],
+            start_date=parsed['start_date'],
+            end_date=parsed['end_date'],
             # Optional fields - use None if not provided
-            latitude=float(data['latitude']) if data.get('latitude') else None,
-            longitude=float(data['longitude']) if data.get('longitude') else None,
-            # Store itinerary as JSON string
-            itinerary=json.dumps(data['itinerary']) if data.get('itinerary') else None
-        )
+            latitude=parsed.get('latitude'),
+            longitude=parsed.get('longitude'),
+            # Store itinerary as a native JSON object
+            itinerary=parsed.get('itinerary')
+        ).returning(*Trip.serialized_columns())
         
         # Save to database with transaction safety
-        db.session.add(new_trip)
+        row = db.session.execute(stmt).one()
         db.session.commit()
         
         # Return success response with complete trip data
         return jsonify({
             "message": "Trip created successfully",
-            "trip": new_trip.to_dict()  # Includes auto-generated ID and timestamps
+            "trip": Trip.row_to_dict(row)  # Includes auto-generated ID and timestamps
         }), 201
         
     except Exception as e:
@@ -189,11 +270,15 @@ def get_user_trips():
     
     Query parameters:
         page (int): Page number (default: 1)
+        cursor (str): Keyset cursor from a previous response's next_cursor
+                      (takes precedence over page)
         per_page (int): Items per page (default: 10, max: 100)
         destination (str): Filter by destination (partial match)
+        include_total (bool): Also return total/pages (costs an extra COUNT query)
         
     Returns:
         200: List of trips with pagination info
+        400: Invalid cursor
         401: Not authenticated
         500: Server error
         
@@ -201,7 +286,11 @@ def get_user_trips():
         - Only returns trips belonging to current user
         - Supports pagination to handle large trip lists
         - Supports filtering by destination
-        - Orders by creation date (newest first)
+        - Orders by creation date (newest first), then id for a stable order
+        - Fetches per_page + 1 rows to detect a next page, so no COUNT(*) runs
+          unless include_total is requested
+        - Cursor mode seeks straight to (created_at, id) through the index, so
+          deep pages cost the same as the first; page mode still uses OFFSET
     """
     # Get current authenticated user
     current_user = get_current_user()
@@ -210,40 +299,63 @@ def get_user_trips():
     
     try:
         # Extract pagination parameters from query string
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 10, type=int), 100)  # Cap at 100 for performance
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)  # Cap at 100 for performance
+        include_total = request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        cursor = request.args.get('cursor')
         
         # Extract optional filtering parameters
         destination_filter = request.args.get('destination')
         
         # Build query - start with user's trips only
-        query = Trip.query.filter_by(user_id=current_user.user_id)
+        # Core select of plain columns: rows are read-only tuples, so no ORM
+        # instances, identity-map entries or lazy loaders are created per trip
+        stmt = select(*Trip.serialized_columns()).where(Trip.user_id == current_user.user_id)
         
         # Apply destination filter if provided (case-insensitive partial match)
         if destination_filter:
-            query = query.filter(Trip.destination.ilike(f'%{destination_filter}%'))
+            stmt = stmt.where(destination_contains(destination_filter))
         
-        # Order by creation date (newest trips first)
-        query = query.order_by(Trip.created_at.desc())
+        # Total count is opt-in: COUNT(*) over all of the user's matching trips
+        total = None
+        if include_total:
+            total = db.session.scalar(select(func.count()).select_from(stmt.subquery()))
         
-        # Apply pagination
-        trips = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False  # Don't raise error for invalid page numbers
-        )
+        if cursor:
+            # Keyset pagination: continue strictly after the cursor row
+            try:
+                cursor_key = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            stmt = stmt.where(tuple_(Trip.created_at, Trip.id) < cursor_key)
+        
+        # Order by creation date (newest trips first), id breaks ties
+        stmt = stmt.order_by(Trip.created_at.desc(), Trip.id.desc()).limit(per_page + 1)
+        
+        # Apply pagination - one extra row tells us whether a next page exists
+        if not cursor:
+            stmt = stmt.offset((page - 1) * per_page)
+        rows = db.session.execute(stmt).all()
+        has_next = len(rows) > per_page
+        trips = rows[:per_page]
+        
+        pagination = {
+            "per_page": per_page,
+            "has_next": has_next,
+            "has_prev": bool(cursor) or page > 1,
+            "next_cursor": encode_cursor(trips[-1]) if has_next else None
+        }
+        if not cursor:
+            pagination["page"] = page
+        
+        if total is not None:
+            pagination["total"] = total
+            pagination["pages"] = -(-total // per_page)  # Ceiling division
         
         # Return trips with pagination metadata
         return jsonify({
-            "trips": [trip.to_dict() for trip in trips.items],
-            "pagination": {
-                "page": page,
-                "pages": trips.pages,
-                "per_page": per_page,
-                "total": trips.total,
-                "has_next": trips.has_next,
-                "has_prev": trips.has_prev
-            }
+            "trips": [Trip.row_to_dict(row) for row in trips],
+            "pagination": pagination
         }), 200
         
     except Exception as e:
@@ -321,6 +433,7 @@ def update_trip(trip_id):
         - Validates all provided data
         - Updates timestamp automatically
         - Only allows users to update their own trips
+        - One UPDATE ... RETURNING round-trip (no SELECT before the write)
     """
     # Get current authenticated user
     current_user = get_current_user()
@@ -333,39 +446,32 @@ def update_trip(trip_id):
         return jsonify({"error": "No data provided"}), 400
     
     try:
-        # Look up trip by ID AND user_id (ensures user owns this trip)
-        trip = Trip.query.filter_by(id=trip_id, user_id=current_user.user_id).first()
-        
-        # Return 404 if trip doesn't exist or doesn't belong to user
-        if not trip:
-            return jsonify({"error": "Trip not found"}), 404
-        
         # Validate update data (only validates provided fields)
-        errors = validate_trip_data(data, is_update=True)
+        errors, parsed = validate_trip_data(data, is_update=True)
         if errors:
             return jsonify({"error": "Validation failed", "details": errors}), 400
         
-        # Update only the fields that were provided
-        if 'destination' in data:
-            trip.destination = data['destination'].strip()
-        
-        if 'start_date' in data:
-            trip.start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        
-        if 'end_date' in data:
-            trip.end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
-        
-        if 'latitude' in data:
-            trip.latitude = float(data['latitude']) if data['latitude'] else None
-        
-        if 'longitude' in data:
-            trip.longitude = float(data['longitude']) if data['longitude'] else None
-        
-        if 'itinerary' in data:
-            trip.itinerary = json.dumps(data['itinerary']) if data['itinerary'] else None
+        # Match on ID AND user_id (ensures user owns this trip)
+        owned_trip = (Trip.id == trip_id) & (Trip.user_id == current_user.user_id)
+        
+        if parsed:
+            # Single UPDATE ... RETURNING: no SELECT first and no ORM object to track.
+            # Only the provided fields are set (parsed holds exactly those, already
+            # converted); updated_at is filled in by the column's onupdate.
+            stmt = (
+                update(Trip).where(owned_trip).values(**parsed)
+                .returning(*Trip.serialized_columns())
+                .execution_options(synchronize_session=False)
+            )
+        else:
+            # Nothing to change - just return the current trip
+            stmt = select(*Trip.serialized_columns()).where(owned_trip)
+        row = db.session.execute(stmt).first()
         
-        # Update timestamp (SQLAlchemy also does this automatically)
-        trip.updated_at = datetime.utcnow()
+        # Return 404 if trip doesn't exist or doesn't belong to user
+        if row is None:
+            db.session.rollback()
+            return jsonify({"error": "Trip not found"}), 404
         
         # Save changes to database
         db.session.commit()
@@ -373,7 +479,7 @@ def update_trip(trip_id):
         # Return updated trip data
         return jsonify({
             "message": "Trip updated successfully",
-            "trip": trip.to_dict()
+            "trip": Trip.row_to_dict(row)
         }), 200
         
     except Exception as e:
@@ -407,24 +513,30 @@ def delete_trip(trip_id):
         return jsonify({"error": "User not found"}), 401
     
     try:
-        # Look up trip by ID AND user_id (ensures user owns this trip)
-        trip = Trip.query.filter_by(id=trip_id, user_id=current_user.user_id).first()
+        # Single DELETE ... RETURNING matched on ID AND user_id (ensures user owns
+        # this trip); the returned columns feed the confirmation response
+        stmt = (
+            delete(Trip)
+            .where(Trip.id == trip_id, Trip.user_id == current_user.user_id)
+            .returning(Trip.id, Trip.destination, Trip.start_date)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = db.session.execute(stmt).first()
         
         # Return 404 if trip doesn't exist or doesn't belong to user
-        if not trip:
+        if deleted is None:
+            db.session.rollback()
             return jsonify({"error": "Trip not found"}), 404
         
-        # Store trip info for confirmation response (before deletion)
+        db.session.commit()
+        
+        # Basic trip info for confirmation
         trip_info = {
-            "id": trip.id,
-            "destination": trip.destination,
-            "start_date": trip.start_date.isoformat()
+            "id": deleted.id,
+            "destination": deleted.destination,
+            "start_date": deleted.start_date.isoformat()
         }
         
-        # Delete trip from database
-        db.session.delete(trip)
-        db.session.commit()
-        
         # Return confirmation
         return jsonify({
             "message": "Trip deleted successfully",
@@ -448,9 +560,11 @@ def search_trips():
         destination (str): Filter by destination (partial match)
         start_date (str): Find trips starting on or after this date (YYYY-MM-DD)
         end_date (str): Find trips ending on or before this date (YYYY-MM-DD)
+        limit (int): Maximum trips to return (default: 50, max: 200)
+        include_total (bool): Also return total matches (costs an extra COUNT query)
         
     Returns:
-        200: List of matching trips
+        200: {"trips": [...], "count": n, "has_more": bool[, "total": n]}
         400: Invalid date format
         401: Not authenticated
         500: Server error
@@ -459,6 +573,8 @@ def search_trips():
         - Only searches within current user's trips
         - Supports multiple filter criteria simultaneously
         - Returns trips ordered by creation date (newest first)
+        - Fetches limit + 1 rows to detect has_more, so no COUNT(*) runs unless
+          include_total is requested
     """
     # Get current authenticated user
     current_user = get_current_user()
@@ -470,38 +586,51 @@ def search_trips():
         destination = request.args.get('destination')
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        limit = min(max(request.args.get('limit', SEARCH_DEFAULT_LIMIT, type=int), 1), SEARCH_MAX_LIMIT)
+        include_total = request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
         
-        # Build query - start with user's trips only
-        query = Trip.query.filter_by(user_id=current_user.user_id)
+        # Build query - start with user's trips only (Core select of plain columns,
+        # no ORM instances per row)
+        stmt = select(*Trip.serialized_columns()).where(Trip.user_id == current_user.user_id)
         
         # Apply destination filter (case-insensitive partial match)
         if destination:
-            query = query.filter(Trip.destination.ilike(f'%{destination}%'))
+            stmt = stmt.where(destination_contains(destination))
         
         # Apply start date filter (trips starting on or after this date)
         if start_date:
             try:
-                start_dt = datetime.strptime(start_date, '%Y-%m-%d').date()
-                query = query.filter(Trip.start_date >= start_dt)
+                start_dt = parse_date(start_date)
+                stmt = stmt.where(Trip.start_date >= start_dt)
             except ValueError:
                 return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD"}), 400
         
         # Apply end date filter (trips ending on or before this date)
         if end_date:
             try:
-                end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
-                query = query.filter(Trip.end_date <= end_dt)
+                end_dt = parse_date(end_date)
+                stmt = stmt.where(Trip.end_date <= end_dt)
             except ValueError:
                 return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD"}), 400
         
-        # Execute query and order results
-        trips = query.order_by(Trip.created_at.desc()).all()
+        # Total match count is opt-in: COUNT(*) over every matching trip
+        total = None
+        if include_total:
+            total = db.session.scalar(select(func.count()).select_from(stmt.subquery()))
+        
+        # Order results and cap them (one extra row tells us whether more exist);
+        # at most SEARCH_MAX_LIMIT + 1 rows, so they are fetched in one go
+        stmt = stmt.order_by(Trip.created_at.desc()).limit(limit + 1)
+        rows = db.session.execute(stmt).all()
+        has_more = len(rows) > limit
+        trips = [Trip.row_to_dict(row) for row in rows[:limit]]
+        
+        result = {"trips": trips, "count": len(trips), "has_more": has_more}
+        if total is not None:
+            result["total"] = total
         
         # Return search results
-        return jsonify({
-            "trips": [trip.to_dict() for trip in trips],
-            "total": len(trips)
-        }), 200
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({"error": f"Search failed: {str(e)}"}), 500
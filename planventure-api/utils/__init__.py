@@ -1,4 +1,4 @@
-from .auth import generate_tokens, validate_token, get_current_user_id
+from .auth import generate_tokens, validate_token, get_current_user_id, CachedJWTManager
 from .middleware import auth_required, get_current_user, require_active_user, admin_required
 from .itinerary_templates import generate_default_itinerary, generate_weekend_getaway_template, generate_business_trip_template
 
@@ -6,6 +6,7 @@ __all__ = [
     'generate_tokens', 
     'validate_token', 
     'get_current_user_id',
+    'CachedJWTManager',
     'auth_required',
     'get_current_user',
     'require_active_user',
@@ -1,8 +1,91 @@
-from datetime import datetime, timedelta
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
-from flask import current_app
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from cachetools import TTLCache
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask import current_app, g
 import jwt
 
+# Algorithms accepted when decoding tokens manually (shared tuple, built once)
+JWT_ALGORITHMS = ('HS256',)
+
+# JWT DECODE CACHE
+# Decoded token payloads keyed by a hash of the raw token string, so repeated
+# requests with the same bearer token skip HMAC verification and JSON parsing
+TOKEN_CACHE_TTL = 30  # Maximum seconds a decoded payload is reused
+_token_cache = TTLCache(maxsize=10000, ttl=TOKEN_CACHE_TTL)
+_token_cache_lock = threading.RLock()
+
+def _token_cache_key(encoded_token):
+    """Build a compact cache key from the raw token (never store the token itself)"""
+    return hashlib.sha256(encoded_token.encode('utf-8')).hexdigest()[:32]
+
+def get_cached_token_payload(encoded_token):
+    """
+    Look up a previously verified token payload
+    
+    Args:
+        encoded_token (str): Raw JWT string
+        
+    Returns:
+        dict or None: Decoded payload if cached and not yet expired, None otherwise
+    """
+    key = _token_cache_key(encoded_token)
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        # Never serve a payload past the token's own 'exp' claim
+        if time.time() >= expires_at:
+            _token_cache.pop(key, None)
+            return None
+        return payload
+
+def cache_token_payload(encoded_token, payload):
+    """
+    Store a verified token payload, clamped to the token's remaining lifetime
+    
+    Args:
+        encoded_token (str): Raw JWT string
+        payload (dict): Payload returned by a successful verification
+    """
+    now = time.time()
+    expires_at = now + TOKEN_CACHE_TTL
+    if payload.get('exp'):
+        expires_at = min(expires_at, payload['exp'])
+    if expires_at <= now:
+        return
+    with _token_cache_lock:
+        _token_cache[_token_cache_key(encoded_token)] = (payload, expires_at)
+
+class CachedJWTManager(JWTManager):
+    """
+    JWTManager that memoizes successful token verification for a short window
+    
+    Note:
+        - Only plain header-token decodes are cached (no CSRF value, no allow_expired)
+        - Invalid or expired tokens are never cached and always hit PyJWT
+        - Blocklist and user loader callbacks still run on every request
+    """
+    def _decode_jwt_from_config(self, encoded_token, csrf_value=None, allow_expired=False):
+        if csrf_value is not None or allow_expired:
+            return super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+        
+        payload = get_cached_token_payload(encoded_token)
+        if payload is None:
+            # Cache miss - run full signature verification, then remember the result
+            payload = super()._decode_jwt_from_config(encoded_token, csrf_value, allow_expired)
+            cache_token_payload(encoded_token, payload)
+        return payload
+
+# TOKEN LIFETIMES
+ACCESS_TOKEN_TTL = timedelta(hours=1)    # Short expiration for security
+REFRESH_TOKEN_TTL = timedelta(days=30)   # Longer expiration for convenience
+ACCESS_TOKEN_EXPIRES_IN = int(ACCESS_TOKEN_TTL.total_seconds())
+PASSWORD_RESET_TOKEN_TTL = timedelta(hours=1)  # Single-use reset links expire quickly
+
 def generate_tokens(user):
     """
     Generate JWT access and refresh tokens for authenticated user
@@ -17,11 +100,11 @@ def generate_tokens(user):
         - Access token expires in 1 hour (short-lived for security)
         - Refresh token expires in 30 days (long-lived for convenience)
         - Identity is stored as string to comply with JWT standards
-        - Additional claims provide extra user context in token
+        - Additional claims provide extra user context in token (the user ID
+          is only carried in 'sub', keeping the signed payload small)
     """
     # Create additional claims to embed in JWT payload for convenience
     additional_claims = {
-        "user_id": user.user_id,           # User's database ID
         "email": user.email_address,       # User's email for reference
         "is_active": user.is_active        # Account status at time of token creation
     }
@@ -31,13 +114,13 @@ def generate_tokens(user):
     access_token = create_access_token(
         identity=str(user.user_id),        # JWT 'sub' claim (must be string)
         additional_claims=additional_claims, # Extra user data in token
-        expires_delta=timedelta(hours=1)    # Short expiration for security
+        expires_delta=ACCESS_TOKEN_TTL      # Short expiration for security
     )
     
     # Generate long-lived refresh token (used to get new access tokens)
     refresh_token = create_refresh_token(
         identity=str(user.user_id),        # Same identity as access token
-        expires_delta=timedelta(days=30)    # Longer expiration for convenience
+        expires_delta=REFRESH_TOKEN_TTL     # Longer expiration for convenience
     )
     
     # Return standardized token package
@@ -45,7 +128,7 @@ def generate_tokens(user):
         "access_token": access_token,       # For API authentication
         "refresh_token": refresh_token,     # For token renewal
         "token_type": "Bearer",            # OAuth2 standard token type
-        "expires_in": 3600                 # Access token lifetime in seconds
+        "expires_in": ACCESS_TOKEN_EXPIRES_IN  # Access token lifetime in seconds
     }
 
 def validate_token(token):
@@ -63,13 +146,24 @@ def validate_token(token):
         - Checks token signature against secret key
         - Verifies token hasn't expired
         - Returns structured response for error handling
+        - Results are memoized on flask.g, so repeated calls with the same token
+          in one request verify the signature only once
     """
+    # Same token already validated during this request
+    request_cache = g.setdefault('_token_validation_cache', {})
+    result = request_cache.get(token)
+    if result is None:
+        result = request_cache[token] = _validate_token_uncached(token)
+    return result
+
+def _validate_token_uncached(token):
+    """Decode and verify a JWT with PyJWT (see validate_token)"""
     try:
         # Decode and validate JWT token
         payload = jwt.decode(
             token,                                    # Token to decode
             current_app.config['JWT_SECRET_KEY'],    # Secret key for verification
-            algorithms=['HS256']                     # Allowed algorithms (security measure)
+            algorithms=JWT_ALGORITHMS                # Allowed algorithms (security measure)
         )
         
         # Return successful validation with user data
@@ -100,6 +194,8 @@ def get_current_user_id():
         - Uses Flask-JWT-Extended to extract identity from current request
         - Must be called within a request context with valid JWT
         - Returns string because JWT subjects are strings
+        - No decoding happens here: Flask-JWT-Extended keeps the payload it
+          verified for this request on flask.g and reads the identity from it
     """
     return get_jwt_identity()
 
@@ -122,16 +218,12 @@ def generate_password_reset_token(user):
     payload = {
         'user_id': user.user_id,               # User who requested reset
         'email': user.email_address,           # Email for verification
-        'exp': datetime.utcnow() + timedelta(hours=1),  # 1-hour expiration
+        'exp': datetime.now(timezone.utc) + PASSWORD_RESET_TOKEN_TTL,  # 1-hour expiration
         'type': 'password_reset'               # Prevent misuse as regular JWT
     }
     
     # Generate token using main secret key (different from JWT secret)
-    try:
-        return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
-    except TypeError:
-        # Handle PyJWT version differences (some return bytes, some return strings)
-        return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
+    return jwt.encode(payload, current_app.config['SECRET_KEY'], algorithm='HS256')
 
 def verify_password_reset_token(token):
     """
@@ -153,7 +245,7 @@ def verify_password_reset_token(token):
         payload = jwt.decode(
             token,
             current_app.config['SECRET_KEY'],
-            algorithms=['HS256']
+            algorithms=JWT_ALGORITHMS
         )
         
         # Verify this is actually a password reset token
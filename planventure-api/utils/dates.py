@@ -0,0 +1,29 @@
+from datetime import date, datetime
+
+def parse_date(value):
+    """
+    Parse a YYYY-MM-DD string into a date
+    
+    Args:
+        value (str): Date string from the request
+        
+    Returns:
+        date: Parsed date
+        
+    Raises:
+        ValueError: If value does not match '%Y-%m-%d' or is not a real date
+        
+    Note:
+        - Accepts exactly what strptime('%Y-%m-%d') accepts, including unpadded
+          forms like '2027-1-1'
+        - Canonical YYYY-MM-DD input takes the date.fromisoformat fast path (a
+          dedicated C parser, several times faster than strptime); anything else
+          falls back to strptime
+        - Shared by the trip routes and the itinerary template generators
+    """
+    if len(value) == 10 and value[4] == '-' and value[7] == '-' and value.isascii():
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass  # strptime below gives the authoritative answer
+    return datetime.strptime(value, '%Y-%m-%d').date()
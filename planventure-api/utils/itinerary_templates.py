@@ -1,6 +1,103 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
+from functools import lru_cache
 import json
 from typing import Dict, Any, List
+from utils.dates import parse_date
+
+# Template generators whose output size is fixed are pure functions of their
+# arguments and the same destinations repeat heavily, so their results are
+# memoized per process. Cached results are shared between callers and must be
+# treated as read-only (the routes only serialize them). generate_default_itinerary
+# and generate_business_trip_template are not cached: their size grows with the
+# requested date range / duration.
+TEMPLATE_CACHE_SIZE = 256
+
+# STATIC TEMPLATE DATA
+# Built once at import. Day templates hold str.format() patterns; only the
+# fields mentioning {destination} are filled in per call.
+_ARRIVAL_DAY = {
+    "morning": "Arrival and hotel check-in",
+    "afternoon": "Explore {destination} city center",
+    "evening": "Welcome dinner at local restaurant"
+}
+_DEPARTURE_DAY = {
+    "morning": "Final sightseeing and souvenir shopping",
+    "afternoon": "Pack and prepare for departure",
+    "evening": "Departure"
+}
+_DAY_TEMPLATES = {
+    'leisure': {
+        "morning": "Visit main attraction in {destination}",
+        "afternoon": "Lunch and explore local neighborhoods", 
+        "evening": "Dinner and local entertainment"
+    },
+    'business': {
+        "morning": "Business meetings",
+        "afternoon": "Lunch meeting and conference sessions",
+        "evening": "Networking dinner"
+    },
+    'adventure': {
+        "morning": "Outdoor activity in {destination}",
+        "afternoon": "Adventure sports or hiking",
+        "evening": "Rest and local cuisine"
+    },
+    'cultural': {
+        "morning": "Visit museums in {destination}",
+        "afternoon": "Cultural sites and historical landmarks",
+        "evening": "Local cultural show or performance"
+    }
+}
+
+# Packing lists are tuples (read-only, shared by every checklist; serialized as JSON arrays)
+_BASE_PACKING = {
+    "essentials": (
+        "Passport/ID",
+        "Travel insurance documents", 
+        "Flight tickets",
+        "Hotel confirmations"
+    ),
+    "clothing": (
+        "Comfortable walking shoes",
+        "Weather-appropriate clothing",
+        "Undergarments",
+        "Sleepwear"
+    ),
+    "toiletries": (
+        "Toothbrush and toothpaste",
+        "Shampoo/soap",
+        "Medications",
+        "Sunscreen"
+    ),
+    "electronics": (
+        "Camera",
+        "Power bank",
+        "Travel adapter",
+        "Phone/tablet"
+    )
+}
+_TRIP_TYPE_PACKING = {
+    "business": (
+        "Business attire",
+        "Laptop",
+        "Business cards",
+        "Presentation materials"
+    ),
+    "adventure": (
+        "Outdoor gear",
+        "Sturdy hiking boots",
+        "Weather-appropriate clothing",
+        "First aid kit"
+    )
+}
+_EXTENDED_STAY_PACKING = (
+    "Laundry supplies",
+    "Extra medications",
+    "Variety of clothing options"
+)
+
+def _fill_day(template, destination):
+    """Substitute the destination into a day template's activity patterns"""
+    return {slot: activity.format(destination=destination) for slot, activity in template.items()}
 
 def generate_default_itinerary(destination, start_date_str, end_date_str, trip_type='leisure'):
     """
@@ -20,8 +117,8 @@ def generate_default_itinerary(destination, start_date_str, end_date_str, trip_t
     """
     # Parse and validate the input dates
     try:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+        start_date = parse_date(start_date_str)
+        end_date = parse_date(end_date_str)
     except ValueError:
         raise ValueError("Dates must be in YYYY-MM-DD format")
     
@@ -36,24 +133,20 @@ def generate_default_itinerary(destination, start_date_str, end_date_str, trip_t
     itinerary = {}
     current_date = start_date
     
+    # Middle days share the same activities, so the destination is filled in once;
+    # every day still gets its own dict (nothing is shared with callers or constants)
+    middle_day = get_day_template(destination, trip_type)
+    
     # Generate activities for each day of the trip
     for day_num in range(duration):
-        day_key = f"Day {day_num + 1} ({current_date.strftime('%Y-%m-%d')})"
+        day_key = f"Day {day_num + 1} ({current_date.isoformat()})"
         
         if day_num == 0:  # First day - arrival activities
-            itinerary[day_key] = {
-                "morning": "Arrival and hotel check-in",
-                "afternoon": f"Explore {destination} city center",
-                "evening": "Welcome dinner at local restaurant"
-            }
+            itinerary[day_key] = _fill_day(_ARRIVAL_DAY, destination)
         elif day_num == duration - 1:  # Last day - departure activities
-            itinerary[day_key] = {
-                "morning": "Final sightseeing and souvenir shopping",
-                "afternoon": "Pack and prepare for departure",
-                "evening": "Departure"
-            }
+            itinerary[day_key] = dict(_DEPARTURE_DAY)
         else:  # Middle days - regular activities based on trip type
-            itinerary[day_key] = get_day_template(destination, day_num + 1, trip_type)
+            itinerary[day_key] = dict(middle_day)
         
         # Move to next day
         current_date += timedelta(days=1)
@@ -68,44 +161,23 @@ def generate_default_itinerary(destination, start_date_str, end_date_str, trip_t
         "packing_checklist": generate_packing_checklist(trip_type, duration)
     }
 
-def get_day_template(destination, day_number, trip_type):
+def get_day_template(destination, trip_type):
     """
-    Get activity template for a specific day based on trip type
+    Get activity template for a regular (middle) day based on trip type
     
     Args:
         destination (str): The travel destination
-        day_number (int): Day number in the trip
         trip_type (str): Type of trip (leisure, business, adventure, cultural)
         
     Returns:
         dict: Activities for morning, afternoon, and evening
     """
-    # Pre-defined activity templates for different trip types
-    templates = {
-        'leisure': {
-            "morning": f"Visit main attraction in {destination}",
-            "afternoon": "Lunch and explore local neighborhoods", 
-            "evening": "Dinner and local entertainment"
-        },
-        'business': {
-            "morning": "Business meetings",
-            "afternoon": "Lunch meeting and conference sessions",
-            "evening": "Networking dinner"
-        },
-        'adventure': {
-            "morning": f"Outdoor activity in {destination}",
-            "afternoon": "Adventure sports or hiking",
-            "evening": "Rest and local cuisine"
-        },
-        'cultural': {
-            "morning": f"Visit museums in {destination}",
-            "afternoon": "Cultural sites and historical landmarks",
-            "evening": "Local cultural show or performance"
-        }
-    }
-    
-    # Return template for specified trip type, default to leisure if not found
-    return templates.get(trip_type, templates['leisure'])
+    # Use template for specified trip type, default to leisure if not found
+    # (the fallback lookup only runs on a miss)
+    template = _DAY_TEMPLATES.get(trip_type)
+    if template is None:
+        template = _DAY_TEMPLATES['leisure']
+    return _fill_day(template, destination)
 
 def generate_packing_checklist(trip_type='leisure', duration=3):
     """
@@ -119,59 +191,20 @@ def generate_packing_checklist(trip_type='leisure', duration=3):
         dict: Categorized packing checklist
     """
     # Base items that everyone needs regardless of trip type
-    base_items = {
-        "essentials": [
-            "Passport/ID",
-            "Travel insurance documents", 
-            "Flight tickets",
-            "Hotel confirmations"
-        ],
-        "clothing": [
-            "Comfortable walking shoes",
-            "Weather-appropriate clothing",
-            "Undergarments",
-            "Sleepwear"
-        ],
-        "toiletries": [
-            "Toothbrush and toothpaste",
-            "Shampoo/soap",
-            "Medications",
-            "Sunscreen"
-        ],
-        "electronics": [
-            "Camera",
-            "Power bank",
-            "Travel adapter",
-            "Phone/tablet"
-        ]
-    }
+    base_items = dict(_BASE_PACKING)
     
     # Add trip-type specific items
-    if trip_type == "business":
-        base_items["business"] = [
-            "Business attire",
-            "Laptop",
-            "Business cards",
-            "Presentation materials"
-        ]
-    elif trip_type == "adventure":
-        base_items["adventure"] = [
-            "Outdoor gear",
-            "Sturdy hiking boots",
-            "Weather-appropriate clothing",
-            "First aid kit"
-        ]
+    extra = _TRIP_TYPE_PACKING.get(trip_type)
+    if extra:
+        base_items[trip_type] = extra
     
     # Add items for longer trips (more than a week)
     if duration > 7:
-        base_items["extended_stay"] = [
-            "Laundry supplies",
-            "Extra medications",
-            "Variety of clothing options"
-        ]
+        base_items["extended_stay"] = _EXTENDED_STAY_PACKING
     
     return base_items
 
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
 def generate_weekend_getaway_template(destination):
     """
     Generate a specialized template for weekend trips (2-3 days)
@@ -260,6 +293,34 @@ def generate_business_trip_template(destination, duration=3):
         ]
     }
 
+# CITY SUGGESTIONS
+# Popular activities for major cities, built once at import (tuples: shared, read-only)
+# In a real application, this could be fetched from external APIs
+_CITY_SUGGESTIONS = {
+    "paris": (
+        {"activity": "Visit Eiffel Tower", "category": "sightseeing", "duration": "2-3 hours"},
+        {"activity": "Louvre Museum", "category": "culture", "duration": "4-5 hours"},
+        {"activity": "Seine River Cruise", "category": "leisure", "duration": "1-2 hours"},
+        {"activity": "Montmartre District", "category": "sightseeing", "duration": "3-4 hours"},
+        {"activity": "French Cooking Class", "category": "experience", "duration": "3 hours"}
+    ),
+    "london": (
+        {"activity": "British Museum", "category": "culture", "duration": "3-4 hours"},
+        {"activity": "Tower of London", "category": "history", "duration": "2-3 hours"},
+        {"activity": "Thames River Walk", "category": "leisure", "duration": "1-2 hours"},
+        {"activity": "West End Show", "category": "entertainment", "duration": "3 hours"},
+        {"activity": "Afternoon Tea", "category": "experience", "duration": "2 hours"}
+    ),
+    "tokyo": (
+        {"activity": "Senso-ji Temple", "category": "culture", "duration": "2 hours"},
+        {"activity": "Shibuya Crossing", "category": "sightseeing", "duration": "1 hour"},
+        {"activity": "Tsukiji Fish Market", "category": "experience", "duration": "2-3 hours"},
+        {"activity": "Cherry Blossom Viewing", "category": "nature", "duration": "2-4 hours"},
+        {"activity": "Ramen Tasting Tour", "category": "food", "duration": "3 hours"}
+    )
+}
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
 def get_city_specific_suggestions(destination):
     """
     Get activity suggestions based on specific destination
@@ -268,45 +329,23 @@ def get_city_specific_suggestions(destination):
         destination (str): The travel destination
         
     Returns:
-        list: List of suggested activities with categories and durations
+        tuple: Suggested activities with categories and durations (read-only)
     """
-    # Database of popular activities for major cities
-    # In a real application, this could be fetched from external APIs
-    city_suggestions = {
-        "paris": [
-            {"activity": "Visit Eiffel Tower", "category": "sightseeing", "duration": "2-3 hours"},
-            {"activity": "Louvre Museum", "category": "culture", "duration": "4-5 hours"},
-            {"activity": "Seine River Cruise", "category": "leisure", "duration": "1-2 hours"},
-            {"activity": "Montmartre District", "category": "sightseeing", "duration": "3-4 hours"},
-            {"activity": "French Cooking Class", "category": "experience", "duration": "3 hours"}
-        ],
-        "london": [
-            {"activity": "British Museum", "category": "culture", "duration": "3-4 hours"},
-            {"activity": "Tower of London", "category": "history", "duration": "2-3 hours"},
-            {"activity": "Thames River Walk", "category": "leisure", "duration": "1-2 hours"},
-            {"activity": "West End Show", "category": "entertainment", "duration": "3 hours"},
-            {"activity": "Afternoon Tea", "category": "experience", "duration": "2 hours"}
-        ],
-        "tokyo": [
-            {"activity": "Senso-ji Temple", "category": "culture", "duration": "2 hours"},
-            {"activity": "Shibuya Crossing", "category": "sightseeing", "duration": "1 hour"},
-            {"activity": "Tsukiji Fish Market", "category": "experience", "duration": "2-3 hours"},
-            {"activity": "Cherry Blossom Viewing", "category": "nature", "duration": "2-4 hours"},
-            {"activity": "Ramen Tasting Tour", "category": "food", "duration": "3 hours"}
-        ]
-    }
-    
-    # Extract city name and normalize it (remove country, make lowercase)
-    dest_key = destination.lower().split(',')[0].strip()
+    # Extract city name and normalize it (remove country, casefold only the city part)
+    dest_key = destination.partition(',')[0].strip().casefold()
     
     # Return city-specific suggestions or generic ones if city not found
-    return city_suggestions.get(dest_key, [
+    suggestions = _CITY_SUGGESTIONS.get(dest_key)
+    if suggestions is not None:
+        return suggestions
+    return (
         {"activity": f"Explore {destination} city center", "category": "sightseeing", "duration": "2-3 hours"},
         {"activity": f"Visit {destination} main attractions", "category": "sightseeing", "duration": "3-4 hours"},
         {"activity": f"Try local cuisine in {destination}", "category": "food", "duration": "1-2 hours"},
         {"activity": f"Walk around {destination} neighborhoods", "category": "leisure", "duration": "2-3 hours"}
-    ])
+    )
 
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
 def get_destination_tips(destination):
     """
     Get general travel tips for any destination
@@ -315,13 +354,13 @@ def get_destination_tips(destination):
         destination (str): The travel destination
         
     Returns:
-        list: List of general travel tips
+        tuple: General travel tips (memoized per destination, read-only)
     """
     # Universal travel tips that apply to most destinations
-    return [
+    return (
         f"Check weather forecast for {destination}",  # Weather-specific tip
         "Book accommodations in advance",              # Planning tip
         "Research local customs and etiquette",       # Cultural tip
         "Keep copies of important documents",         # Safety tip
         "Learn basic phrases in local language"       # Communication tip
-    ]
+    )
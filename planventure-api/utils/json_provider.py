@@ -0,0 +1,73 @@
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+import orjson
+
+# Serialization options shared by every response:
+# - OPT_NAIVE_UTC: naive datetimes (the models store UTC) are emitted with a +00:00 offset
+# - OPT_NON_STR_KEYS: accept int/date dict keys like the stdlib encoder does
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+def _default(obj):
+    """
+    Fallback serializer for types orjson does not handle natively
+
+    Args:
+        obj: Object that orjson could not serialize
+
+    Returns:
+        JSON-compatible representation of the object
+
+    Raises:
+        TypeError: If the object type is not supported
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        # Markup and similar HTML-safe strings
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_bytes(obj, option=0):
+    """
+    Serialize obj straight to JSON bytes with the shared response options
+    
+    Args:
+        obj: Object to serialize
+        option (int): Extra orjson option flags to combine with ORJSON_OPTIONS
+        
+    Returns:
+        bytes: UTF-8 encoded JSON
+        
+    Use case: Building response bodies by hand (e.g. streamed JSON arrays)
+    """
+    return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS | option)
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson (Rust-based encoder/decoder)
+
+    Replaces the stdlib json module for jsonify(), dict return values and
+    request.get_json(), so no call sites need to change.
+
+    Usage:
+        app.json = OrjsonProvider(app)
+
+    Note:
+        - Serializes date/datetime/UUID/dataclass values natively (ISO 8601 for dates)
+        - Naive datetimes are treated as UTC, matching how the models store them
+        - Responses are built directly from bytes, skipping a str round-trip
+        - Keys are emitted in insertion order (not sorted)
+    """
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Serialize arguments to JSON and wrap them in an application/json response"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps_bytes(obj, orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype='application/json')
@@ -1,9 +1,145 @@
+import logging
+import threading
 from functools import wraps
-from flask import request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from cachetools import TTLCache
+from flask import request, jsonify, current_app, g
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import Session, defer, make_transient_to_detached, object_session
 from models.user import User, db
+from utils.auth import JWT_ALGORITHMS, get_cached_token_payload, cache_token_payload
 import jwt as pyjwt
 
+# Auth diagnostics go through logging at DEBUG level (off by default), so the hot
+# path does no string formatting or stdout writes
+log = logging.getLogger(__name__)
+
+# USER LOOKUP CACHE
+# Detached column snapshots of recently authenticated users keyed by user_id.
+# A hit is re-attached to the request's session with merge(load=False), which
+# emits no SQL, so hot users skip the per-request primary-key lookup.
+USER_CACHE_TTL = 30  # Maximum seconds a snapshot is reused (bounds staleness of is_active)
+_user_cache = TTLCache(maxsize=1024, ttl=USER_CACHE_TTL)
+_user_cache_lock = threading.RLock()
+_user_cache_generation = 0  # Bumped by every invalidation; a load that overlapped one is not cached
+# The password hash is never needed to authenticate a request, so it is neither
+# loaded nor cached here (it still lazy-loads if something touches it)
+_USER_COLUMNS = tuple(attr.key for attr in sa_inspect(User).column_attrs if attr.key != 'hashed_password')
+_USER_LOAD_OPTIONS = (defer(User.hashed_password),)
+
+def load_user(user_id):
+    """
+    Load a user by primary key, using the process-wide snapshot cache
+    
+    Args:
+        user_id (int): User primary key
+        
+    Returns:
+        User: Instance attached to the current session, or None if not found
+        
+    Note:
+        - Missing users are not cached, so a new account is visible immediately
+        - ORM updates and deletes of a user evict its snapshot automatically
+    """
+    with _user_cache_lock:
+        snapshot = _user_cache.get(user_id)
+        generation = _user_cache_generation
+    if snapshot is not None:
+        return db.session.merge(snapshot, load=False)
+    
+    user = db.session.get(User, user_id, options=_USER_LOAD_OPTIONS)
+    if user is not None:
+        # Cache a detached copy, never the session-bound instance itself
+        snapshot = User(**{key: getattr(user, key) for key in _USER_COLUMNS})
+        make_transient_to_detached(snapshot)
+        with _user_cache_lock:
+            # Skip caching if a user changed while we were reading: the row we
+            # got may predate that change (read before its commit)
+            if generation == _user_cache_generation:
+                _user_cache[user_id] = snapshot
+    return user
+
+def invalidate_cached_user(user_id):
+    """Drop a user's cached snapshot (runs automatically when the ORM updates or deletes the row)"""
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache_generation += 1
+        _user_cache.pop(user_id, None)
+
+# Any ORM change to a user (deactivation, password change, account removal)
+# evicts its snapshot twice: at flush, and again once the transaction commits.
+# Between the two, a concurrent request can still read the old committed row;
+# the second eviction drops anything it cached, and the generation check in
+# load_user() stops a read that straddles the commit from re-caching it.
+# Changes made outside the ORM (raw SQL, another process) are picked up when
+# the snapshot expires after USER_CACHE_TTL seconds.
+_PENDING_EVICTIONS = 'planventure_evict_user_ids'  # Session.info key
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _evict_changed_user(mapper, connection, target):
+    invalidate_cached_user(target.user_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_EVICTIONS, set()).add(target.user_id)
+
+@event.listens_for(Session, 'after_commit')
+def _evict_committed_users(session):
+    for user_id in session.info.pop(_PENDING_EVICTIONS, ()):
+        invalidate_cached_user(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_users(session):
+    # Nothing changed in the database; the flush-time eviction was harmless
+    session.info.pop(_PENDING_EVICTIONS, None)
+
+# Failures that mean "not authenticated": missing/malformed header, bad signature,
+# expired or wrong-type token. Anything else (database errors, bugs in the route)
+# propagates to Flask's error handling instead of being reported as a 401.
+AUTH_ERRORS = (JWTExtendedException, pyjwt.PyJWTError)
+
+def as_user_id(raw):
+    """
+    Convert a JWT identity (string subject) to an integer user ID
+    
+    Args:
+        raw: Identity from the token ('sub' claim), usually a numeric string
+        
+    Returns:
+        int or None: User ID, or None if the identity is not a valid integer
+    """
+    if isinstance(raw, int):
+        return raw
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        log.debug("could not convert user_id to int: %r", raw)
+        return None
+
+def _may_carry_token():
+    """
+    Cheap pre-check for optional auth: could this request carry a JWT at all?
+    
+    Returns:
+        bool: False only when tokens are read from headers alone and the
+              Authorization header is absent
+    """
+    config = current_app.config
+    locations = config['JWT_TOKEN_LOCATION']
+    if isinstance(locations, str):
+        locations = (locations,)
+    if any(location != 'headers' for location in locations):
+        return True  # Cookie/query/JSON tokens - let Flask-JWT-Extended decide
+    return config['JWT_HEADER_NAME'] in request.headers
+
+def _authenticated_user():
+    """Return the active user already resolved for this request, or None"""
+    user = g.get('current_user')
+    if user is not None and user.is_active:
+        return user
+    return None
+
 def auth_required(optional=False):
     """
     Decorator to protect routes with JWT authentication
@@ -27,80 +163,93 @@ def auth_required(optional=False):
         - For optional auth: Continues execution even without token
         - Handles token validation, user lookup, and account status checks
     """
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            try:
-                print(f"🔍 Debug - auth_required called, optional={optional}")
-                
-                if optional:
-                    # OPTIONAL AUTHENTICATION FLOW
-                    # Allow access without token, but provide user context if token exists
-                    verify_jwt_in_request(optional=True)  # Don't fail if no token
-                    current_user_id = get_jwt_identity()
-                    print(f"🔍 Debug - optional auth, user_id: {current_user_id} (type: {type(current_user_id)})")
-                    
-                    if current_user_id:
-                        # Token exists - validate user and account status
-                        # Convert string user_id to integer for database lookup
-                        if isinstance(current_user_id, str):
-                            try:
-                                current_user_id = int(current_user_id)
-                            except ValueError:
-                                print(f"❌ Could not convert user_id to int: {current_user_id}")
-                                return f(*args, **kwargs)  # Continue without auth for optional
-                        
-                        # Check if user exists and is active
-                        user = User.query.filter_by(user_id=current_user_id).first()
-                        if user and not user.is_active:
-                            return jsonify({"error": "User account is inactive"}), 401
-                else:
-                    # REQUIRED AUTHENTICATION FLOW
-                    # Must have valid token to proceed
-                    print("🔍 Debug - verifying JWT...")
-                    verify_jwt_in_request()  # Will raise exception if no/invalid token
-                    current_user_id = get_jwt_identity()
-                    print(f"🔍 Debug - required auth, user_id: {current_user_id} (type: {type(current_user_id)})")
-                    
-                    # Validate user identity exists in token
-                    if not current_user_id:
-                        return jsonify({"error": "Invalid token: no user identity"}), 401
-                    
-                    # Convert string user_id to integer for database lookup
-                    if isinstance(current_user_id, str):
-                        try:
-                            current_user_id = int(current_user_id)
-                        except ValueError:
-                            return jsonify({"error": "Invalid user ID format"}), 401
-                    
-                    # Verify user exists in database
-                    user = User.query.filter_by(user_id=current_user_id).first()
-                    print(f"🔍 Debug - found user: {user}")
-                    
-                    if not user:
-                        return jsonify({"error": "User not found"}), 401
-                    
-                    # Check if account is active (not deactivated)
-                    if not user.is_active:
-                        return jsonify({"error": "Account is deactivated"}), 401
-                
-                # Authentication successful - proceed to route
-                print("🔍 Debug - authentication successful, calling route")
-                return f(*args, **kwargs)
-                
-            except Exception as e:
-                # Handle authentication errors
-                print(f"❌ Debug - Exception in auth_required: {e}")
-                print(f"❌ Debug - Exception type: {type(e)}")
-                
-                if optional:
-                    # For optional auth, continue without authentication on error
-                    return f(*args, **kwargs)
-                # For required auth, return error
-                return jsonify({"error": f"Authentication failed: {str(e)}"}), 401
-                
-        return decorated_function
-    return decorator
+    # The flow is fixed when the route is decorated, so pick the specialized
+    # decorator once instead of branching on `optional` for every request
+    return _optional_auth if optional else _required_auth
+
+def _required_auth(f):
+    """REQUIRED AUTHENTICATION FLOW - must have valid token to proceed (see auth_required)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # An outer auth decorator already authenticated this request
+        # (nested protected helpers) - skip re-verification and lookup
+        if _authenticated_user() is not None:
+            return f(*args, **kwargs)
+        
+        try:
+            verify_jwt_in_request()  # Will raise exception if no/invalid token
+            current_user_id = get_jwt_identity()
+            log.debug("required auth, user_id: %r", current_user_id)
+            
+            # Validate user identity exists in token
+            if not current_user_id:
+                return jsonify({"error": "Invalid token: no user identity"}), 401
+            
+            # Convert string user_id to integer for database lookup
+            current_user_id = as_user_id(current_user_id)
+            if current_user_id is None:
+                return jsonify({"error": "Invalid user ID format"}), 401
+            
+            # Verify user exists in database
+            user = load_user(current_user_id)
+            log.debug("found user: %s", user)
+            g.current_user = user  # Reused by get_current_user() in the route
+            
+            if not user:
+                return jsonify({"error": "User not found"}), 401
+            
+            # Check if account is active (not deactivated)
+            if not user.is_active:
+                return jsonify({"error": "Account is deactivated"}), 401
+            
+        except AUTH_ERRORS as e:
+            # Handle authentication errors - required auth returns an error
+            log.debug("auth_required failed", exc_info=True)
+            return jsonify({"error": f"Authentication failed: {str(e)}"}), 401
+        
+        # Authentication successful - proceed to route
+        return f(*args, **kwargs)
+            
+    return decorated_function
+
+def _optional_auth(f):
+    """OPTIONAL AUTHENTICATION FLOW - user context if a token exists (see auth_required)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # An outer auth decorator already authenticated this request
+        if _authenticated_user() is not None:
+            return f(*args, **kwargs)
+        
+        # Anonymous request - skip the JWT machinery entirely (get_current_user()
+        # in the route then returns None straight from flask.g)
+        if not _may_carry_token():
+            g.current_user = None
+            return f(*args, **kwargs)
+        
+        try:
+            # Allow access without token, but provide user context if token exists
+            verify_jwt_in_request(optional=True)  # Don't fail if no token
+            current_user_id = get_jwt_identity()
+            log.debug("optional auth, user_id: %r", current_user_id)
+            
+            # Token exists - validate user and account status
+            # (an identity that is not an integer continues without auth)
+            current_user_id = as_user_id(current_user_id) if current_user_id else None
+            if current_user_id is not None:
+                # Check if user exists and is active
+                user = load_user(current_user_id)
+                g.current_user = user  # Reused by get_current_user() in the route
+                if user and not user.is_active:
+                    return jsonify({"error": "User account is inactive"}), 401
+            
+        except AUTH_ERRORS:
+            # For optional auth, continue without authentication on error
+            log.debug("auth_required failed", exc_info=True)
+        
+        # Authentication successful (or absent) - proceed to route
+        return f(*args, **kwargs)
+            
+    return decorated_function
 
 def get_current_user():
     """
@@ -114,34 +263,38 @@ def get_current_user():
         - Handles string to integer conversion for user_id lookup
         - Returns None if any step fails (no token, invalid user_id, user not found)
         - Safe to call from any route - won't raise exceptions
+        - Result is memoized on flask.g for the rest of the request (auth_required
+          seeds it), so repeated calls don't re-query the database
         
     Usage:
         current_user = get_current_user()
         if current_user:
             print(f"Authenticated as: {current_user.email_address}")
     """
+    # Already resolved earlier in this request
+    if 'current_user' in g:
+        return g.current_user
+    
     try:
         # Extract user identity from JWT token in current request
         current_user_id = get_jwt_identity()
-        print(f"🔍 Debug - current_user_id from token: {current_user_id} (type: {type(current_user_id)})")
+        log.debug("current_user_id from token: %r", current_user_id)
         
         if current_user_id:
             # Convert string user_id to integer for database lookup
             # JWT subjects are strings, but our user_id is integer
-            if isinstance(current_user_id, str):
-                try:
-                    current_user_id = int(current_user_id)
-                except ValueError:
-                    print(f"❌ Could not convert user_id to int: {current_user_id}")
-                    return None
+            current_user_id = as_user_id(current_user_id)
+            if current_user_id is None:
+                return None
             
             # Look up user in database
-            user = User.query.filter_by(user_id=current_user_id).first()
-            print(f"🔍 Debug - found user: {user}")
+            user = load_user(current_user_id)
+            log.debug("found user: %s", user)
+            g.current_user = user
             return user
     except Exception as e:
         # Log error but don't raise - this function should be safe to call
-        print(f"❌ Error getting current user: {e}")
+        log.debug("error getting current user: %s", e)
     return None
 
 def require_active_user(f):
@@ -170,6 +323,10 @@ def require_active_user(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        # Already authenticated and active earlier in this request
+        if _authenticated_user() is not None:
+            return f(*args, **kwargs)
+        
         try:
             # Verify JWT token is present and valid
             verify_jwt_in_request()
@@ -182,12 +339,12 @@ def require_active_user(f):
             # Explicitly check account is active
             if not current_user.is_active:
                 return jsonify({"error": "Account is deactivated"}), 401
-            
-            # User is authenticated and active - proceed
-            return f(*args, **kwargs)
-        except Exception as e:
+        except AUTH_ERRORS as e:
             # Any authentication error results in 401
             return jsonify({"error": f"Authentication required: {str(e)}"}), 401
+        
+        # User is authenticated and active - proceed
+        return f(*args, **kwargs)
     
     return decorated_function
 
@@ -216,15 +373,11 @@ def admin_required(f):
         - Add admin assignment functionality
     """
     @wraps(f)
-    @jwt_required()  # Use Flask-JWT-Extended decorator for simplicity
+    @_required_auth  # Verifies the token once and resolves an active user onto flask.g
     def decorated_function(*args, **kwargs):
-        # Get current authenticated user
-        current_user = get_current_user()
-        if not current_user:
-            return jsonify({"error": "User not found"}), 401
-        
         # PLACEHOLDER: Add admin check when User model has is_admin field
-        # if not current_user.is_admin:
+        # (_required_auth has already put the active user on g.current_user)
+        # if not g.current_user.is_admin:
         #     return jsonify({"error": "Admin access required"}), 403
         
         # Currently allows all authenticated users
@@ -232,6 +385,10 @@ def admin_required(f):
     
     return decorated_function
 
+# Claims validate_token_manual depends on; tokens missing either are rejected
+# by PyJWT instead of being accepted without an expiry or identity
+_MANUAL_DECODE_OPTIONS = {'require': ['exp', 'sub']}
+
 def validate_token_manual(token):
     """
     Manual token validation function (alternative to Flask-JWT-Extended)
@@ -255,26 +412,41 @@ def validate_token_manual(token):
         - Uses PyJWT library directly for validation
         - Returns user object and error for flexible handling
         - Useful for custom authentication flows
+        - Verified payloads are shared with the JWT decode cache (clamped to the
+          token's 'exp') and users come from load_user(), so a reused bearer token
+          skips both HMAC verification and the user SELECT; invalid or expired
+          tokens are never cached
     """
     try:
         # Remove 'Bearer ' prefix if present
-        if token.startswith('Bearer '):
-            token = token[7:]  # Remove first 7 characters
+        token = token.removeprefix('Bearer ')
         
-        # Decode and validate JWT token using PyJWT
-        payload = pyjwt.decode(
-            token,
-            current_app.config['JWT_SECRET_KEY'],  # Secret key for verification
-            algorithms=['HS256']                   # Allowed algorithms (security)
-        )
+        # A JWT is always ASCII header.payload.signature - reject anything else
+        # before hashing it for the cache or running a (failing) PyJWT decode
+        if token.count('.') != 2 or not token.isascii():
+            return None, "Invalid token"
+        
+        payload = get_cached_token_payload(token)
+        if payload is None:
+            # Decode and validate JWT token using PyJWT
+            payload = pyjwt.decode(
+                token,
+                current_app.config['JWT_SECRET_KEY'],  # Secret key for verification
+                algorithms=JWT_ALGORITHMS,             # Allowed algorithms (security)
+                options=_MANUAL_DECODE_OPTIONS         # Tokens must carry 'exp' and 'sub'
+            )
+            cache_token_payload(token, payload)
         
         # Extract user ID from token subject
         user_id = payload.get('sub')
         if not user_id:
             return None, "Invalid token: no user identity"
         
-        # Look up user in database
-        user = User.query.filter_by(user_id=user_id).first()
+        # Look up user (subjects are strings; the user cache is keyed by integer id)
+        user_id = as_user_id(user_id)
+        if user_id is None:
+            return None, "Invalid token: no user identity"
+        user = load_user(user_id)
         if not user:
             return None, "User not found"
         
@@ -334,8 +506,10 @@ def auth_middleware_manual(f):
         if error:
             return jsonify({"error": error}), 401
         
-        # Add user to request context for route access
+        # Add user to request context for route access (g.current_user lets
+        # get_current_user() and nested auth decorators reuse it without a lookup)
         request.current_user = user
+        g.current_user = user
         
         # Proceed to route with authenticated user
         return f(*args, **kwargs)
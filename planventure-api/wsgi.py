@@ -1,12 +1,27 @@
 import sys
 import os
 
-# Add your project directory to sys.path
-project_home = '/home/kdornadula/planventure/planventure-api'
+# Add the project directory (the folder containing this file) to sys.path so the
+# WSGI server can import app from any working directory
+project_home = os.path.dirname(os.path.abspath(__file__))
 if project_home not in sys.path:
-    sys.path = [project_home] + sys.path
+    sys.path.insert(0, project_home)
 
 from app import app as application
+from models.user import db
+
+# DATABASE WARM-UP
+# Create the engine, run dialect initialization and put one connection in the pool
+# at worker boot, so the first request doesn't pay for it
+with application.app_context():
+    engine = db.engine
+    with engine.connect() as connection:
+        connection.exec_driver_sql('SELECT 1')
+
+# With gunicorn --preload the warm-up runs in the master; forked workers must not
+# share its pooled connections, so each child drops them (without closing the
+# parent's sockets) and opens its own on demand
+os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
 
 if __name__ == "__main__":
     application.run()
@@ -63,6 +63,7 @@ const TripsPage = () => {
         page: currentPage,
         per_page: 6,
         destination: searchTerm || undefined,
+        include_total: 1,
       });
 
       setTrips(response.data.trips || []);